@@ -0,0 +1,85 @@
+"""Нагрузка на ASGI-приложение с синхронными или асинхронными лентами.
+
+Запускается отдельным процессом (см. bench_async_views.py): набор
+представлений выбирается BLOGICUM_ASYNC_VIEWS при импорте адресов.
+Запросы идут через AsyncClient (ASGIHandler) по BENCH_CONCURRENCY
+одновременно. BENCH_QUERY_DELAY_MS добавляет задержку к каждому
+запросу к БД, изображая сетевую СУБД. Печатает одну строку JSON.
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from profile_rps import seed
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+
+CONCURRENCY = int(os.getenv('BENCH_CONCURRENCY', 8))
+REQUESTS = int(os.getenv('BENCH_REQUESTS', 300))
+QUERY_DELAY = float(os.getenv('BENCH_QUERY_DELAY_MS', 0)) / 1000
+
+
+def delayed(execute, sql, params, many, context):
+    time.sleep(QUERY_DELAY)
+    return execute(sql, params, many, context)
+
+
+def delay_queries(sender, connection, **kwargs):
+    # В начало списка: execute_wrapper() снимает последнюю обёртку.
+    connection.execute_wrappers.insert(0, delayed)
+
+
+async def load(client, urls):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    timings = []
+
+    async def fetch(url):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, url
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        fetch(urls[i % len(urls)]) for i in range(REQUESTS)
+    ))
+    return time.perf_counter() - start, timings
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    author, post = seed()
+    if QUERY_DELAY:
+        connection_created.connect(delay_queries)
+        for connection in connections.all():
+            delay_queries(None, connection)
+    # Страницы авторизованного пользователя не кешируются целиком,
+    # если bench_async_views задал BLOGICUM_PAGE_CACHE_FOR_USERS=0.
+    client = AsyncClient()
+    client.force_login(author)
+    urls = [
+        '/', f'/posts/{post.pk}/', '/category/bench/',
+        f'/profile/{author.username}/',
+    ]
+    asyncio.run(load(client, urls))
+    elapsed, timings = asyncio.run(load(client, urls))
+    cuts = statistics.quantiles(timings, n=100)
+    print(json.dumps({
+        'async_views': settings.ASYNC_READ_VIEWS,
+        'query_delay_ms': QUERY_DELAY * 1000,
+        'requests': REQUESTS,
+        'rps': round(REQUESTS / elapsed, 1),
+        'p50_ms': round(cuts[49], 2),
+        'p99_ms': round(cuts[98], 2),
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent / 'asgi_load.py'
+QUERY_DELAYS = os.getenv('BENCH_QUERY_DELAYS_MS', '0,2').split(',')
+
+
+def run_load(async_views, delay, tmp_path):
+    env = {
+        **os.environ,
+        'BLOGICUM_ASYNC_VIEWS': '1' if async_views else '0',
+        'BENCH_QUERY_DELAY_MS': delay,
+        'DJANGO_DB_NAME': str(tmp_path / f'{async_views}-{delay}.sqlite3'),
+        'DJANGO_ALLOWED_HOSTS': 'testserver',
+        # Замеряются представления, а не выдача страниц из кеша.
+        'BLOGICUM_PAGE_CACHE_FOR_USERS': '0',
+    }
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_async_views_under_asgi_load(tmp_path):
+    for delay in QUERY_DELAYS:
+        results = {
+            mode: run_load(mode == 'async', delay, tmp_path)
+            for mode in ('sync', 'async')
+        }
+        for mode, result in results.items():
+            print(
+                f'{mode:5} задержка БД {delay} мс: {result["rps"]} rps, '
+                f'p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс'
+            )
+        # Выигрыш есть, когда заметную долю запроса занимает ожидание
+        # БД; с локальной SQLite переходы между потоками его съедают.
+        if float(delay) >= 2:
+            assert results['async']['rps'] >= results['sync']['rps'] * 0.9
@@ -0,0 +1,40 @@
+import pytest
+from django.test import Client
+
+from blog.models import Comment, Post
+from conftest import BATCH_SIZE, env_sizes, grow_posts, measure
+
+pytestmark = [pytest.mark.django_db]
+
+
+def grow_comments(target, post, author):
+    """Досоздаёт комментарии к post через bulk_create."""
+    existing = post.comments.count()
+    while existing < target:
+        size = min(BATCH_SIZE, target - existing)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text=f'Комментарий {i}')
+            for i in range(existing, existing + size)
+        )
+        existing += size
+
+
+def test_post_detail_does_not_depend_on_comment_count(
+    author, category, location
+):
+    grow_posts(1, author, category, location)
+    post = Post.objects.get()
+    client = Client()
+    client.force_login(author)
+    url = f'/posts/{post.id}/'
+
+    results = {}
+    for size in env_sizes('BENCH_COMMENT_COUNTS', '10,1000,10000'):
+        grow_comments(size, post, author)
+        results[size] = measure(client, url)
+        print(f'comments={size}: {results[size][0]:.2f} ms, '
+              f'{results[size][1]} queries')
+
+    timings = [ms for ms, _ in results.values()]
+    assert len({n for _, n in results.values()}) == 1
+    assert max(timings) < min(timings) * 3
@@ -0,0 +1,47 @@
+import statistics
+import time
+
+import pytest
+from django.db import connection
+
+from blog.models import Post
+from conftest import REPEAT, env_sizes, grow_posts
+
+pytestmark = [pytest.mark.django_db]
+
+PAGE = 10
+
+
+def fetch_page(queryset):
+    """Байт, прочитанных из SQLite для страницы, и медиана времени (мс)."""
+    sql, params = queryset[:PAGE].query.sql_with_params()
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    size = sum(
+        len(value.encode()) if isinstance(value, str) else 8
+        for row in rows for value in row if value is not None
+    )
+    return size, statistics.median(timings)
+
+
+@pytest.mark.parametrize('text_kb', env_sizes('BENCH_TEXT_KB', '1,64'))
+def test_feed_page_skips_text(author, category, location, text_kb):
+    grow_posts(
+        PAGE * 2, author, category, location,
+        text='Длинный текст поста. ' * (text_kb * 1024 // 38 or 1),
+    )
+    feed = Post.objects.get_all_posts().is_published()
+    full_bytes, full_ms = fetch_page(
+        feed.select_related('author', 'category', 'location')
+    )
+    feed_bytes, feed_ms = fetch_page(feed.for_feed())
+    print(
+        f'text {text_kb} KB: с text {full_bytes} байт за {full_ms:.2f} мс, '
+        f'for_feed {feed_bytes} байт за {feed_ms:.2f} мс'
+    )
+    assert feed_bytes < full_bytes
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog.hot_cache import TieredCache
+
+WORKERS = 16
+COMPUTE_SECONDS = 0.02
+
+
+def stampede(get_or_set):
+    """Сколько раз WORKERS потоков пересчитают один истёкший ключ."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(COMPUTE_SECONDS)
+        return 'value'
+
+    barrier = threading.Barrier(WORKERS)
+
+    def worker():
+        barrier.wait()
+        get_or_set('bench:key', compute)
+
+    threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(calls)
+
+
+def naive(key, compute):
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, 60)
+    return value
+
+
+@pytest.mark.parametrize('backend', ('locmem', 'filebased'))
+def test_single_flight_stops_stampede(tmp_path, backend):
+    location = {
+        'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }[backend]
+    with override_settings(CACHES={'default': location}):
+        tiered = TieredCache()
+        naive_calls = stampede(naive)
+        cache.clear()
+        tiered_calls = stampede(
+            lambda key, compute: tiered.get_or_set(key, compute, 60)
+        )
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            cache.get('bench:key')
+        shared_us = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(1000):
+            tiered.get('bench:key')
+        local_us = (time.perf_counter() - start) * 1000
+    print(
+        f'{backend}: пересчётов без защиты {naive_calls}, '
+        f'с hot_cache {tiered_calls}; чтение кеш Django {shared_us:.1f} мкс, '
+        f'ближний уровень {local_us:.1f} мкс; {tiered.stats()}'
+    )
+    assert tiered_calls == 1
+    assert tiered_calls < naive_calls
@@ -0,0 +1,36 @@
+import pytest
+from django.test import Client, override_settings
+
+from blog.models import Comment
+from blog.post_handling import COMMENTS_PAGINATION
+from conftest import grow_posts, measure
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize('page', ('index', 'detail'))
+def test_logged_in_cost_approaches_anonymous(
+    client, author, category, location, page
+):
+    grow_posts(100, author, category, location)
+    post = author.posts.order_by('id').first()
+    Comment.objects.bulk_create(
+        Comment(text='Комментарий', post=post, author=author)
+        for _ in range(COMMENTS_PAGINATION)
+    )
+    url = '/' if page == 'index' else f'/posts/{post.id}/'
+    logged_in = Client()
+    logged_in.force_login(author)
+
+    anonymous_ms, _ = measure(client, url)
+    shared_ms, shared_queries = measure(logged_in, url)
+    with override_settings(PAGE_CACHE_FOR_USERS=False):
+        private_ms, _ = measure(logged_in, url)
+    print(
+        f'{page}: аноним {anonymous_ms:.2f} мс, вошедший из общего кеша '
+        f'{shared_ms:.2f} мс ({shared_queries} запроса), '
+        f'без кеша {private_ms:.2f} мс'
+    )
+    # Разница с анонимом - в основном чтение сессии и пользователя.
+    assert shared_queries <= 2
+    assert shared_ms < private_ms / 2
@@ -0,0 +1,32 @@
+import statistics
+import time
+
+import pytest
+from django.core.cache import cache
+
+from blog.fragments import render_post_cards
+from blog.models import Post
+from conftest import REPEAT, grow_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def render_ms(posts, clear):
+    timings = []
+    for _ in range(REPEAT):
+        if clear:
+            cache.clear()
+        start = time.perf_counter()
+        render_post_cards(posts)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def test_warm_cards_render_faster(author, category, location):
+    grow_posts(10, author, category, location)
+    posts = list(Post.objects.get_all_posts().is_published().for_feed()[:10])
+
+    cold = render_ms(posts, clear=True)
+    warm = render_ms(posts, clear=False)
+    print(f'10 cards: cold {cold:.2f} ms, warm {warm:.2f} ms')
+    assert warm < cold
@@ -0,0 +1,23 @@
+import pytest
+
+from conftest import env_sizes, grow_posts, measure
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_detail_latency_is_flat(
+    no_cache, client, author, category, location
+):
+    grow_posts(1, author, category, location)
+    url = f'/posts/{author.posts.order_by("id").first().id}/'
+
+    results = {}
+    for size in env_sizes('BENCH_POST_COUNTS', '1000,10000,100000'):
+        grow_posts(size, author, category, location)
+        results[size] = measure(client, url)
+        print(f'posts={size}: {results[size][0]:.2f} ms, '
+              f'{results[size][1]} queries')
+
+    timings = [ms for ms, _ in results.values()]
+    assert len({n for _, n in results.values()}) == 1
+    assert max(timings) < min(timings) * 3
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Category, Post
+from blog.references import categories, locations
+from conftest import REPEAT, env_sizes, grow_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def query_ms(make_queryset):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        list(make_queryset()[:10])
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def joined_feed():
+    """Лента до справочников: JOIN с категориями и местами."""
+    return Post.objects.filter(
+        is_published=True,
+        pub_date__lte=timezone.now(),
+        category__is_published=True,
+    ).select_related('author', 'category', 'location').defer('text')
+
+
+def registry_feed():
+    return Post.objects.get_all_posts().is_published().for_feed()
+
+
+@pytest.mark.parametrize('posts', env_sizes('BENCH_POST_COUNTS', '10000'))
+def test_feed_without_reference_joins(author, category, location, posts):
+    grow_posts(posts, author, category, location)
+    categories.current()
+    locations.current()
+    joined = query_ms(joined_feed)
+    registry = query_ms(registry_feed)
+    print(
+        f'{posts} постов, страница ленты: JOIN {joined:.2f} мс, '
+        f'справочники {registry:.2f} мс'
+    )
+    assert [post.category.title for post in registry_feed()[:10]] == [
+        post.category.title for post in joined_feed()[:10]
+    ]
+    assert registry < joined * 1.5
+
+
+def test_category_lookup_from_registry(category):
+    categories.current()
+    timings = {}
+    for name, lookup in (
+        ('запрос к БД', lambda: Category.objects.get(slug=category.slug)),
+        ('справочник', lambda: categories.get_by_slug(category.slug)),
+    ):
+        start = time.perf_counter()
+        for _ in range(REPEAT * 10):
+            lookup()
+        timings[name] = (time.perf_counter() - start) * 1e6 / (REPEAT * 10)
+    print('категория по slug: ' + ', '.join(
+        f'{name} {us:.1f} мкс' for name, us in timings.items()
+    ))
+    assert timings['справочник'] < timings['запрос к БД'] / 10
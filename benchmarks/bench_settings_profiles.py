@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent / 'profile_rps.py'
+
+
+def run_profile(profile, tmp_path):
+    env = {
+        **os.environ,
+        'BLOGICUM_PROFILE': profile,
+        'DJANGO_DB_NAME': str(tmp_path / f'{profile}.sqlite3'),
+        'DJANGO_STATIC_ROOT': str(tmp_path / f'static-{profile}'),
+        'DJANGO_ALLOWED_HOSTS': 'testserver',
+        'DJANGO_SECRET_KEY': 'benchmark-secret-key',
+        'DJANGO_CACHE_DIR': str(tmp_path / f'cache-{profile}'),
+    }
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_production_profile_is_not_slower(tmp_path):
+    results = {
+        profile: run_profile(profile, tmp_path)
+        for profile in ('development', 'production')
+    }
+    for profile, result in results.items():
+        print(f'{profile}: {result["rps"]} requests/s')
+    assert results['production']['rps'] >= (
+        results['development']['rps'] * 0.9
+    )
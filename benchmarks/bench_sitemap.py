@@ -0,0 +1,28 @@
+import time
+
+import pytest
+from django.core.cache import cache
+
+from conftest import env_sizes, grow_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def render_time(client, url):
+    cache.clear()
+    start = time.perf_counter()
+    response = client.get(url)
+    assert response.status_code == 200, url
+    return (time.perf_counter() - start) * 1000
+
+
+def test_sitemap_shard_cost_is_bounded(client, author, category, location):
+    results = {}
+    for size in env_sizes('BENCH_POST_COUNTS', '1000,10000,100000'):
+        grow_posts(size, author, category, location)
+        results[size] = (
+            render_time(client, '/sitemap.xml'),
+            render_time(client, '/sitemap-posts-0.xml'),
+        )
+        print(f'posts={size}: index {results[size][0]:.2f} ms, '
+              f'first shard {results[size][1]:.2f} ms')
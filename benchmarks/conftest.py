@@ -0,0 +1,87 @@
+import os
+import statistics
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.hot_cache import hot_cache
+from blog.models import Category, Location, Post, make_excerpt
+
+BATCH_SIZE = 5000
+REPEAT = 30
+
+
+def env_sizes(name, default):
+    """Объёмы данных для бенчмарка: BENCH_POST_COUNTS=1000,1000000."""
+    return [int(x) for x in os.getenv(name, default).split(',') if x]
+
+
+def grow_posts(target, author, category, location, text='Текст поста ' * 20):
+    """Досоздаёт посты через bulk_create, пока их не станет target."""
+    now = timezone.now()
+    excerpt = make_excerpt(text)
+    existing = Post.objects.count()
+    while existing < target:
+        size = min(BATCH_SIZE, target - existing)
+        Post.objects.bulk_create(
+            Post(
+                title=f'Пост {existing + i}',
+                text=text,
+                excerpt=excerpt,
+                pub_date=now - timedelta(minutes=existing + i),
+                author=author,
+                category=category,
+                location=location,
+            )
+            for i in range(size)
+        )
+        existing += size
+
+
+def measure(client, url, repeat=REPEAT):
+    """Медиана времени ответа (мс) и число запросов к БД."""
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, url
+    return statistics.median(timings), len(queries)
+
+
+@pytest.fixture
+def no_cache():
+    """Без кеша страниц и фрагментов: замеряется путь запросов к БД."""
+    hot_cache.clear_local()
+    with override_settings(
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }},
+        HOT_CACHE_MAX_ENTRIES=0,
+    ):
+        yield
+    hot_cache.clear_local()
+
+
+@pytest.fixture
+def author():
+    return get_user_model().objects.create(username='bench_author')
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(
+        title='Бенчмарк', description='Бенчмарк', slug='bench'
+    )
+
+
+@pytest.fixture
+def location():
+    return Location.objects.create(name='Бенчмарк')
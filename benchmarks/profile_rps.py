@@ -0,0 +1,83 @@
+"""Запросов в секунду для профиля настроек из BLOGICUM_PROFILE.
+
+Запускается отдельным процессом (см. bench_settings_profiles.py):
+настройки читаются при импорте, поэтому профиль в одном процессе
+не переключить. База и статика берутся из DJANGO_DB_NAME и
+DJANGO_STATIC_ROOT. Печатает одну строку JSON.
+"""
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from blog.models import (  # noqa: E402
+    Category, Comment, Location, Post, make_excerpt
+)
+
+POSTS = int(os.getenv('BENCH_POSTS', 200))
+REQUESTS = int(os.getenv('BENCH_REQUESTS', 300))
+
+
+def seed():
+    author = get_user_model().objects.create(username='bench_author')
+    category = Category.objects.create(
+        title='Бенчмарк', description='Бенчмарк', slug='bench'
+    )
+    location = Location.objects.create(name='Бенчмарк')
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(
+            title=f'Пост {i}', text='Текст поста ' * 20,
+            excerpt=make_excerpt('Текст поста ' * 20), author=author,
+            category=category, location=location,
+            pub_date=now - timedelta(minutes=i),
+        )
+        for i in range(POSTS)
+    )
+    post = Post.objects.order_by('pk').first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'Комментарий {i}')
+        for i in range(20)
+    )
+    return author, post
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    if 'Manifest' in getattr(settings, 'STATICFILES_STORAGE', ''):
+        call_command('collectstatic', interactive=False, verbosity=0)
+    author, post = seed()
+    # Страницы авторизованного пользователя не кешируются целиком.
+    client = Client()
+    client.force_login(author)
+    urls = ['/', f'/posts/{post.pk}/', '/category/bench/']
+    for url in urls:
+        assert client.get(url).status_code == 200, url
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        client.get(urls[i % len(urls)])
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'profile': settings.PROFILE,
+        'requests': REQUESTS,
+        'rps': round(REQUESTS / elapsed, 1),
+    }))
+
+
+if __name__ == '__main__':
+    main()
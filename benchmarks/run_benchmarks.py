@@ -0,0 +1,199 @@
+"""Прогон всех адресов blog/urls.py и pages/urls.py с записью в JSON.
+
+Перед запуском базу заполняют командой seed_blog, например:
+
+    export DJANGO_DB_NAME=/tmp/bench.sqlite3
+    python blogicum/manage.py migrate
+    python blogicum/manage.py seed_blog --posts 1000000 --comments 10000000
+    python benchmarks/run_benchmarks.py --out benchmarks/results
+    python benchmarks/run_benchmarks.py \
+        --baseline benchmarks/results/<коммит>.json
+
+Для каждого адреса и вида клиента (аноним, автор) записываются
+перцентили времени ответа и число SQL-запросов. Результат называется
+по текущему коммиту; --baseline сравнивает с прошлым прогоном и
+завершается с кодом 1 при регрессии.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import URLPattern, URLResolver, reverse  # noqa: E402
+
+from blog import urls as blog_urls  # noqa: E402
+from blog.models import Category, Comment, Location, Post  # noqa: E402
+from pages import urls as pages_urls  # noqa: E402
+
+PERCENTILES = (50, 90, 99)
+
+
+def iter_routes(patterns, namespace, params=()):
+    """(имя, параметры пути) для всех именованных адресов patterns."""
+    for pattern in patterns:
+        names = tuple(params) + tuple(
+            getattr(pattern.pattern, 'converters', {})
+        )
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, namespace, names)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}:{pattern.name}', names
+
+
+def sample_kwargs():
+    """Значения параметров путей из данных в базе."""
+    post = (
+        Post.objects.get_all_posts().is_published()
+        .filter(comments__isnull=False)
+        .order_by('-pub_date').first()
+    ) or Post.objects.get_all_posts().is_published().first()
+    if post is None:
+        raise SystemExit('Нет опубликованных постов: запустите seed_blog.')
+    comment = Comment.objects.filter(post=post).first()
+    return post.author, {
+        'post_id': post.pk,
+        'pk': comment.pk if comment else 0,
+        'category_slug': post.category.slug,
+        'username': post.author.username,
+        'format': 'rss',
+        'section': 'posts',
+        'shard': post.pk // 50000,
+    }
+
+
+def collect_urls(values):
+    urls = {}
+    for module, namespace in ((blog_urls, 'blog'), (pages_urls, 'pages')):
+        for name, params in iter_routes(module.urlpatterns, namespace):
+            url = reverse(name, kwargs={key: values[key] for key in params})
+            urls[f'{name}({",".join(params)})' if params else name] = url
+    return urls
+
+
+def measure(client, url, repeat):
+    client.get(url)
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    cuts = (
+        statistics.quantiles(timings, n=100) if repeat > 1 else timings * 99
+    )
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        **{f'p{p}_ms': round(cuts[p - 1], 3) for p in PERCENTILES},
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(repeat):
+    author, values = sample_kwargs()
+    # Ошибка одного адреса попадает в отчёт как status 500,
+    # а не останавливает прогон.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    anonymous = Client(raise_request_exception=False)
+    logged_in = Client(raise_request_exception=False)
+    logged_in.force_login(author)
+    results = {}
+    for key, url in collect_urls(values).items():
+        for client_name, client in (('anon', anonymous), ('user', logged_in)):
+            results[f'{key} [{client_name}]'] = {
+                'url': url, **measure(client, url, repeat)
+            }
+    return {
+        'commit': current_commit(),
+        'profile': getattr(settings, 'PROFILE', 'development'),
+        'repeat': repeat,
+        'volumes': {
+            model.__name__: model.objects.count()
+            for model in (Post, Comment, Category, Location)
+        },
+        'results': results,
+    }
+
+
+def regressions(report, baseline, tolerance):
+    """Адреса, ставшие медленнее (p50) или сделавшие больше запросов."""
+    found = []
+    for key, result in report['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            found.append(
+                f'{key}: запросов {before["queries"]} -> {result["queries"]}'
+            )
+        if result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            found.append(
+                f'{key}: p50 {before["p50_ms"]} -> {result["p50_ms"]} мс'
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument(
+        '--out', type=Path, default=ROOT / 'benchmarks' / 'results'
+    )
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='Допустимое замедление p50 относительно baseline (доля).'
+    )
+    options = parser.parse_args()
+
+    report = run(options.repeat)
+    options.out.mkdir(parents=True, exist_ok=True)
+    path = options.out / f'{report["commit"]}.json'
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    for key, result in report['results'].items():
+        print(f'{key:60} {result["status"]} {result["queries"]:>3} q '
+              f'p50 {result["p50_ms"]:8.2f} ms '
+              f'p99 {result["p99_ms"]:8.2f} ms')
+    print(f'Результаты: {path}')
+
+    if options.baseline:
+        found = regressions(
+            report, json.loads(options.baseline.read_text()),
+            options.tolerance,
+        )
+        for line in found:
+            print(f'РЕГРЕССИЯ {line}')
+        sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
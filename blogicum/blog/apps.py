@@ -5,3 +5,14 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from core.invalidation import bus
+        from core.perf import register_stats
+
+        from . import signals  # noqa: F401
+        from .cache_versions import apply_event
+        from .hot_cache import hot_cache
+
+        bus.subscribe(apply_event)
+        register_stats('hot_cache', hot_cache.stats)
@@ -0,0 +1,216 @@
+"""Асинхронные версии представлений чтения для работы под ASGI.
+
+ORM в Django 3.2 синхронный, поэтому независимые запросы страницы
+(объект страницы, срез ленты, порция комментариев, агрегаты для ETag)
+выполняются одновременно в отдельных потоках через sync_to_async и
+asyncio.gather. Ответ затем собирает код синхронного представления,
+получая готовые результаты из self.prefetched.
+
+Классы называются так же, как в views; какой модуль обслуживает
+адреса, выбирает настройка ASYNC_READ_VIEWS (см. urls).
+"""
+import asyncio
+from functools import partial, update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+from core.middleware import recording_queries
+
+from . import views
+from .models import Post
+from .page_cache import PageCacheMixin
+
+
+def run_in_worker(request, func):
+    """Корутина func() в отдельном потоке со своим соединением с БД."""
+    def run():
+        try:
+            with recording_queries(request):
+                return func()
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+class AsyncReadMixin:
+    """Асинхронный вход в представление.
+
+    Порядок: кеш страницы, затем одновременные запросы
+    get_concurrent_queries, затем обычный dispatch.
+    """
+
+    prefetched = {}
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Проверка initkwargs остаётся за View.as_view.
+        super().as_view(**initkwargs)
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.async_dispatch(request, *args, **kwargs)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        update_wrapper(view, cls, updated=())
+        update_wrapper(view, cls.dispatch, assigned=())
+        return view
+
+    def get_concurrent_queries(self):
+        """{имя: функция без аргументов} для независимых запросов."""
+        return {}
+
+    def is_revisit(self):
+        """У клиента есть копия страницы: ответ, скорее всего, 304.
+
+        Тогда заранее выполняются только запросы для валидаторов.
+        """
+        return (
+            'HTTP_IF_NONE_MATCH' in self.request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in self.request.META
+        )
+
+    def get_prefetched(self, name, compute):
+        """Готовый результат запроса name, а без него - compute()."""
+        if name in self.prefetched:
+            return self.prefetched[name]
+        return compute()
+
+    def prepare(self):
+        """Синхронная часть до запросов.
+
+        Возвращает ответ из кеша страниц (или None) и можно ли
+        раздавать запросы по потокам: внутри транзакции чужие
+        соединения не видят её данных.
+        """
+        if isinstance(self, PageCacheMixin) and (
+            self.is_page_cacheable(self.request)
+        ):
+            response = self.get_cached_response()
+            if response is not None:
+                return response, False
+        # Пользователь загружается здесь, а не в каждом потоке.
+        self.request.user.is_authenticated
+        return None, not connection.in_atomic_block
+
+    async def async_dispatch(self, request, *args, **kwargs):
+        dispatch = sync_to_async(self.dispatch)
+        if request.method not in ('GET', 'HEAD'):
+            return await dispatch(request, *args, **kwargs)
+        response, concurrent = await sync_to_async(self.prepare)()
+        if response is not None:
+            return response
+        queries = self.get_concurrent_queries()
+        try:
+            if concurrent:
+                results = await asyncio.gather(*(
+                    run_in_worker(request, query)
+                    for query in queries.values()
+                ))
+            else:
+                results = [
+                    await sync_to_async(query)()
+                    for query in queries.values()
+                ]
+        except BaseException:
+            # Например, Http404: блокировку ключа страницы, взятую в
+            # prepare, иначе сняли бы в dispatch.
+            if isinstance(self, PageCacheMixin):
+                await sync_to_async(self.release_page_cache_lock)()
+            raise
+        self.prefetched = dict(zip(queries, results))
+        return await dispatch(request, *args, **kwargs)
+
+
+class AsyncFeedMixin(AsyncReadMixin):
+    """Валидаторы и страница ленты (и дата отложенной публикации для
+    кеша страниц) запрашиваются одновременно.
+    """
+
+    def get_concurrent_queries(self):
+        queries = {'state': super().get_modification_state}
+        if self.is_revisit():
+            return queries
+        paginate = super().paginate_queryset
+        queries['page'] = lambda: paginate(
+            self.get_queryset(), self.get_paginate_by(None)
+        )
+        if isinstance(self, PageCacheMixin) and (
+            self.is_page_cacheable(self.request)
+        ):
+            queries['next_publication'] = super().get_next_publication
+        return {**super().get_concurrent_queries(), **queries}
+
+    def get_modification_state(self):
+        return self.get_prefetched(
+            'state', super().get_modification_state
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.get_prefetched('page', partial(
+            super().paginate_queryset, queryset, page_size
+        ))
+
+    def get_next_publication(self):
+        return self.get_prefetched(
+            'next_publication', super().get_next_publication
+        )
+
+
+class IndexListView(AsyncFeedMixin, views.IndexListView):
+    pass
+
+
+class CategoryPostListView(AsyncFeedMixin, views.CategoryPostListView):
+    pass
+
+
+class ProfilePostListView(AsyncFeedMixin, views.ProfilePostListView):
+
+    def get_concurrent_queries(self):
+        queries = super().get_concurrent_queries()
+        if not self.is_revisit():
+            queries['user'] = self.get_user
+        return queries
+
+    def get_queryset(self):
+        username = self.kwargs.get('username') or self.request.user.username
+        queryset = Post.objects.get_all_posts().filter(
+            author__username=username
+        ).for_feed()
+        if self.request.user.is_authenticated and (
+            self.request.user.username == username
+        ):
+            return queryset
+        return queryset.is_published()
+
+    def get(self, request, *args, **kwargs):
+        self.user = self.get_prefetched('user', self.get_user)
+        return super().get(request, *args, **kwargs)
+
+
+class PostDetailView(AsyncReadMixin, views.PostDetailView):
+    """Пост, порция комментариев и их агрегаты - одновременно."""
+
+    def get_concurrent_queries(self):
+        post_id = self.kwargs[self.pk_url_kwarg]
+        queries = {
+            **super().get_concurrent_queries(),
+            'post': self.get_object,
+            'comments_state': partial(super().get_comments_state, post_id),
+        }
+        if not self.is_revisit():
+            queries['comments'] = partial(super().get_comments_page, post_id)
+        return queries
+
+    def get_comments_page(self, post_id):
+        return self.get_prefetched('comments', partial(
+            super().get_comments_page, post_id
+        ))
+
+    def get_comments_state(self, post_id):
+        return self.get_prefetched('comments_state', partial(
+            super().get_comments_state, post_id
+        ))
@@ -4,9 +4,10 @@ from django.shortcuts import redirect
 from django.urls import reverse
 
 from .models import Post, Comment
+from .object_handling import CachedObjectMixin
 
 
-class AuthorOrAdminMixin(UserPassesTestMixin):
+class AuthorOrAdminMixin(CachedObjectMixin, UserPassesTestMixin):
     """Проверка, что пользователь - автор объекта или администратор."""
 
     model = None
@@ -15,7 +16,8 @@ class AuthorOrAdminMixin(UserPassesTestMixin):
     def test_func(self):
         obj = self.get_object()
         return (
-            obj.author == self.request.user or self.request.user.is_superuser
+            obj.author_id == self.request.user.pk
+            or self.request.user.is_superuser
         )
 
     def handle_no_permission(self):
@@ -0,0 +1,83 @@
+"""Версии объектов для ключей кеша.
+
+Вместо удаления закешированных фрагментов меняется версия объекта,
+от которого они зависят: ключи со старой версией больше не читаются
+и со временем вытесняются из кеша. Версия - случайная метка, поэтому
+после вытеснения самой версии старые ключи не оживают.
+
+Новые версии рассылаются и по шине инвалидации (core.invalidation):
+по ним сбрасывают свои данные кеши в памяти процессов, а apply_event
+записывает их в кеш Django процесса, если он в памяти (LocMem): иначе
+другие процессы отдавали бы страницы под старыми версиями.
+"""
+from uuid import uuid4
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from core.invalidation import bus
+
+KEY_PREFIX = 'blog:version'
+
+
+def version_key(namespace, pk):
+    return f'{KEY_PREFIX}:{namespace}:{pk}'
+
+
+def new_version():
+    return uuid4().hex[:12]
+
+
+def get_versions(*keys):
+    """Версии для пар (namespace, pk) одним обращением к кешу."""
+    names = {version_key(*key): key for key in keys}
+    found = cache.get_many(names)
+    missing = {
+        name: new_version() for name in names if name not in found
+    }
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {names[name]: version for name, version in found.items()}
+
+
+def set_versions(versions):
+    cache.set_many(
+        {version_key(*key): version for key, version in versions.items()},
+        None,
+    )
+
+
+def bump(*keys):
+    """Инвалидирует всё, что закешировано под версиями keys.
+
+    Версии меняются дважды. Сразу - чтобы сама транзакция не читала
+    свои старые страницы. И после фиксации: параллельный запрос мог
+    прочитать первую версию, но ещё старые данные, и закешировать их
+    под ней. Рассылаются только окончательные версии.
+    """
+    set_versions({key: new_version() for key in keys})
+    versions = {key: new_version() for key in keys}
+    transaction.on_commit(lambda: set_versions(versions))
+    bus.publish(
+        (namespace, pk, version)
+        for (namespace, pk), version in versions.items()
+    )
+
+
+def apply_event(namespace, pk, version):
+    """Обработчик шины: версия из события другого процесса.
+
+    Нужен только кешу в памяти процесса (LocMem). Общий кеш уже хранит
+    версии: журнал, повторённый каждым процессом, записал бы в него
+    старую версию поверх новой, а сброс очистил бы его для всех.
+    Если события пропущены, кеш процесса очищается: какие версии
+    устарели, неизвестно.
+    """
+    if not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return
+    if namespace is None:
+        cache.clear()
+    else:
+        cache.set(version_key(namespace, pk), version, None)
@@ -14,5 +14,5 @@ class CommentMixin:
     def get_success_url(self):
         return reverse(
             'blog:post_detail',
-            kwargs={'post_id': self.object.post.pk}
+            kwargs={'post_id': self.object.post_id}
         )
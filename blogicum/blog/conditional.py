@@ -0,0 +1,141 @@
+"""Условные GET-запросы: ETag и Last-Modified для страниц блога.
+
+Валидаторы считаются одним агрегирующим запросом до обработки
+запроса, поэтому ответ 304 не выполняет остальных запросов страницы
+и не рендерит шаблон. В ETag входят также пользователь, адрес страницы
+и версии из cache_versions: например, ('feed', 'refs') - карточки
+выводят категории, места и авторов.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .cache_versions import get_versions
+from .models import Comment
+from .pagination import CursorPaginator, InvalidCursor
+
+
+def conditional_response(request, response):
+    """304 вместо готового ответа, если у клиента он уже есть."""
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response,
+    )
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified по состоянию из get_modification_state."""
+
+    validator_dependencies = (('feed', 'refs'),)
+
+    def get_validator_dependencies(self):
+        return self.validator_dependencies
+
+    def get_modification_state(self):
+        """Словарь значений, меняющихся вместе со страницей.
+
+        Ключ last_modified - дата для Last-Modified. None отключает
+        валидаторы для запроса.
+        """
+        raise NotImplementedError(
+            'Укажите, от чего зависит содержимое страницы.'
+        )
+
+    def get_validators(self):
+        state = self.get_modification_state()
+        if state is None:
+            return None, None
+        dependencies = self.get_validator_dependencies()
+        versions = get_versions(*dependencies)
+        raw = repr((
+            self.request.user.pk,
+            self.request.get_full_path(),
+            sorted(state.items()),
+            [versions[key] for key in dependencies],
+        ))
+        last_modified = state['last_modified']
+        return (
+            quote_etag(hashlib.md5(raw.encode()).hexdigest()),
+            int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        if etag is None:
+            return super().dispatch(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Браузер должен каждый раз переспрашивать страницу.
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+class FeedConditionalGetMixin(ConditionalGetMixin):
+    """Валидаторы ленты по строкам текущей страницы.
+
+    Нужен CursorPaginationMixin; для старых ссылок ?page= и неверных
+    курсоров валидаторы не считаются.
+    """
+
+    def get_modification_state(self):
+        if self.cursor_kwarg not in self.request.GET and (
+            self.page_kwarg in self.request.GET
+        ):
+            return None
+        paginator = CursorPaginator(
+            self.get_queryset().select_related(None),
+            self.get_paginate_by(None),
+            self.get_cursor_ordering(),
+        )
+        try:
+            direction, values = paginator.decode_cursor(
+                self.request.GET.get(self.cursor_kwarg)
+            )
+        except InvalidCursor:
+            return None
+        return paginator.page_queryset(direction, values).aggregate(
+            last_modified=Max('updated_at'),
+            newest=Max('pub_date'),
+            count=Count('pk'),
+            members=Sum('pk'),
+        )
+
+
+class PostConditionalGetMixin(ConditionalGetMixin):
+    """Валидаторы страницы поста: сам пост и его комментарии.
+
+    У комментариев нет даты изменения, поэтому правки комментариев
+    учитываются через версию ('post', id), которую меняют сигналы.
+    """
+
+    def get_validator_dependencies(self):
+        return (('post', self.kwargs[self.pk_url_kwarg]), ('feed', 'refs'))
+
+    def get_comments_state(self, post_id):
+        return Comment.objects.filter(post_id=post_id).aggregate(
+            comments_added=Max('created_at'), comments=Count('pk')
+        )
+
+    def get_modification_state(self):
+        post = self.get_object()
+        state = self.get_comments_state(post.pk)
+        state['post_modified'] = post.updated_at
+        state['last_modified'] = max(
+            date for date in (post.updated_at, state['comments_added'])
+            if date is not None
+        )
+        return state
@@ -0,0 +1,149 @@
+"""Потоковые выгрузка и загрузка данных блога (export_blog, import_blog).
+
+Записи в формате dumpdata/loaddata: {"model": ..., "pk": ..., "fields":
+{...}}. Файл - JSON-массив, как db.json, или JSON Lines (одна запись на
+строку). И при чтении, и при записи в памяти держится не больше одной
+пачки записей.
+"""
+import datetime
+import json
+import re
+from contextlib import contextmanager
+from io import StringIO
+from itertools import chain, islice
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Category, Comment, Location, Post
+
+CHUNK_SIZE = 64 * 1024
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def dump_models():
+    """Модели выгрузки в порядке зависимостей внешних ключей."""
+    return (get_user_model(), Category, Location, Post, Comment)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def local_field_names(model):
+    """Поля без many-to-many: их значения требуют запроса на объект."""
+    return [field.name for field in model._meta.local_fields]
+
+
+def serialize(model, batch_size):
+    """Записи всех объектов model пачками по batch_size."""
+    objects = model._base_manager.order_by('pk').iterator(
+        chunk_size=batch_size
+    )
+    fields = local_field_names(model)
+    for batch in batched(objects, batch_size):
+        yield serializers.serialize('python', batch, fields=fields)
+
+
+class DumpEncoder(DjangoJSONEncoder):
+    """В отличие от dumpdata, даты пишутся с микросекундами."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def to_json(record):
+    return json.dumps(record, cls=DumpEncoder, ensure_ascii=False)
+
+
+def iter_json_array(stream, buffer):
+    """Элементы JSON-массива по мере чтения; buffer - уже прочитанное."""
+    decoder = json.JSONDecoder()
+    position = buffer.index('[') + 1
+    eof = False
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            if position == len(buffer):
+                raise ValueError
+            record, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            # Запись оборвалась на границе куска: дочитываем.
+            if eof:
+                raise ValueError('JSON-массив оборван или повреждён.')
+            chunk = stream.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield record
+
+
+def iter_json_lines(stream, buffer):
+    """Записи JSON Lines; buffer - уже прочитанное начало файла."""
+    lines = StringIO(buffer + stream.readline())
+    for line in chain(lines, stream):
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_records(stream):
+    """Записи файла выгрузки; формат определяется по первому символу."""
+    buffer = stream.read(CHUNK_SIZE)
+    if buffer.lstrip().startswith('['):
+        return iter_json_array(stream, buffer)
+    return iter_json_lines(stream, buffer)
+
+
+def auto_date_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+def deserialize(records, date_fields=()):
+    """Несохранённые объекты моделей из записей выгрузки.
+
+    Пустые даты date_fields заполняются текущим временем.
+    """
+    now = timezone.now()
+    for deserialized in serializers.deserialize(
+        'python', records, ignorenonexistent=True
+    ):
+        instance = deserialized.object
+        for field in date_fields:
+            if getattr(instance, field.attname) is None:
+                setattr(instance, field.attname, now)
+        if isinstance(instance, Post) and not instance.excerpt:
+            # Выгрузки без анонса, например db.json.
+            instance.update_excerpt()
+        yield instance
+
+
+@contextmanager
+def keep_dates(model):
+    """bulk_create сохраняет даты из выгрузки, а не текущее время.
+
+    loaddata добивается того же сохранением raw=True, у bulk_create
+    такого режима нет. Возвращает поля с отключённым auto_now.
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in auto_date_fields(model)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield [field for field, _, _ in fields]
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
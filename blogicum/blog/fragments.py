@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache_versions import get_versions
+from .hot_cache import hot_cache
+from .references import REFS, refresh_references
+
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def card_dependencies(post):
+    """Объекты, от которых зависит HTML карточки поста."""
+    return (
+        ('post', post.pk),
+        ('category', post.category_id),
+        ('location', post.location_id),
+        ('user', post.author_id),
+    )
+
+
+def render_post_cards(posts):
+    """HTML карточек постов страницы; готовые берутся из кеша.
+
+    На страницу уходит одно чтение версий, одно чтение карточек и одна
+    запись недостающих, независимо от числа постов.
+    """
+    posts = list(posts)
+    versions = get_versions(REFS, *{
+        key for post in posts for key in card_dependencies(post)
+    })
+    refresh_references(posts, versions)
+    keys = [
+        f'blog:card:{post.pk}:' + ':'.join(
+            versions[key] for key in card_dependencies(post)
+        )
+        for post in posts
+    ]
+    cards = hot_cache.get_many(keys)
+    rendered = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            rendered[key] = render_to_string(
+                POST_CARD_TEMPLATE, {'post': post}
+            )
+    if rendered:
+        hot_cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def render_post_text(post):
+    """Текст поста через linebreaksbr, с кешем до следующего сохранения.
+
+    updated_at меняется при каждом save(), поэтому правка текста
+    сразу даёт новый ключ.
+    """
+    key = f'blog:text:{post.pk}:{post.updated_at.timestamp()}'
+    return mark_safe(hot_cache.get_or_set(
+        key,
+        lambda: linebreaksbr(post.text, autoescape=True),
+        settings.POST_CARD_CACHE_TIMEOUT,
+    ))
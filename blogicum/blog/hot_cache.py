@@ -0,0 +1,277 @@
+"""Двухуровневый кеш для горячих ключей блога.
+
+Перед кешем Django стоит ограниченный LRU в памяти процесса (число
+записей и байт, срок не больше HOT_CACHE_LOCAL_TIMEOUT). В кеше Django
+значение лежит в конверте со сроком годности и временем расчёта:
+
+- ранний пересчёт (XFetch): чем ближе срок и дольше расчёт, тем
+  вероятнее, что очередной запрос пересчитает значение заранее, и срок
+  не истекает у всех процессов разом;
+- один расчёт на ключ: считает тот, кто взял блокировку (cache.add),
+  остальные отдают прежнее значение, если оно хранится с запасом
+  stale, или ждут результата.
+
+Нужен только кеш Django, поэтому всё работает и на locmem, и на
+filebased. Через этот модуль идут ключи, которые не меняют значения
+(в них версия или дата); сами версии из cache_versions читаются из
+кеша Django напрямую, иначе процессы видели бы их по-разному.
+"""
+import math
+import pickle
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+LOCK_PREFIX = 'blog:lock:'
+WAIT_STEP = 0.01
+
+
+class LocalLRU:
+    """LRU в памяти процесса.
+
+    Значения хранятся сериализованными: изменение полученного объекта
+    не портит кеш, а размер записи известен точно.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            payload, deadline = entry
+            if deadline <= now:
+                self.remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload, deadline, max_entries, max_bytes):
+        with self.lock:
+            self.remove(key)
+            if len(payload) > max_bytes:
+                return
+            self.entries[key] = (payload, deadline)
+            self.bytes += len(payload)
+            while len(self.entries) > max_entries or self.bytes > max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key):
+        """Удаление без блокировки: вызывается из get и set."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+            self.evictions = 0
+
+
+class TieredCache:
+    """LRU процесса перед кешем Django alias.
+
+    None не кешируется: это признак отсутствия значения.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.local = LocalLRU()
+        self.counters = Counter()
+        self.counters_lock = threading.Lock()
+        self.random = random.Random()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def count(self, name, value=1):
+        with self.counters_lock:
+            self.counters[name] += value
+
+    def remember(self, key, envelope, now):
+        """Копия конверта в ближнем уровне."""
+        self.local.set(
+            key,
+            pickle.dumps(envelope, pickle.HIGHEST_PROTOCOL),
+            min(envelope[2], now + settings.HOT_CACHE_LOCAL_TIMEOUT),
+            settings.HOT_CACHE_MAX_ENTRIES,
+            settings.HOT_CACHE_MAX_BYTES,
+        )
+
+    def read(self, key, now):
+        """Конверт (значение, срок, срок с запасом, время расчёта)."""
+        payload = self.local.get(key, now)
+        if payload is not None:
+            self.count('local_hits')
+            return pickle.loads(payload)
+        envelope = self.shared.get(key)
+        if envelope is None:
+            self.count('misses')
+            return None
+        self.count('shared_hits')
+        self.remember(key, envelope, now)
+        return envelope
+
+    def is_fresh(self, envelope, now):
+        """Срок не истёк и не выпал ранний пересчёт (XFetch)."""
+        _, expires_at, _, delta = envelope
+        early = delta * settings.HOT_CACHE_BETA * -math.log(
+            1 - self.random.random()
+        )
+        return now + early < expires_at
+
+    def lookup(self, key):
+        """Значение (или None) и нужно ли его пересчитать."""
+        now = time.time()
+        envelope = self.read(key, now)
+        if envelope is None:
+            return None, True
+        if self.is_fresh(envelope, now):
+            return envelope[0], False
+        self.count('early' if now < envelope[1] else 'expired')
+        return envelope[0], True
+
+    def get(self, key):
+        """Значение, в том числе устаревшее в пределах запаса."""
+        value, _ = self.lookup(key)
+        return value
+
+    def set(self, key, value, timeout, stale=0, delta=0.0):
+        """Значение на timeout секунд и ещё stale - как устаревшее.
+
+        delta - время расчёта: чем оно больше, тем раньше пересчёт.
+        """
+        now = time.time()
+        envelope = (value, now + timeout, now + timeout + stale, delta)
+        self.shared.set(key, envelope, timeout + stale)
+        self.remember(key, envelope, now)
+
+    def get_many(self, keys):
+        """{ключ: значение} для найденных keys, без раннего пересчёта."""
+        now = time.time()
+        found, missing = {}, []
+        for key in keys:
+            payload = self.local.get(key, now)
+            if payload is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(payload)[0]
+        self.count('local_hits', len(found))
+        if missing:
+            envelopes = self.shared.get_many(missing)
+            for key, envelope in envelopes.items():
+                self.remember(key, envelope, now)
+                found[key] = envelope[0]
+            self.count('shared_hits', len(envelopes))
+            self.count('misses', len(missing) - len(envelopes))
+        return found
+
+    def set_many(self, values, timeout):
+        now = time.time()
+        envelopes = {
+            key: (value, now + timeout, now + timeout, 0.0)
+            for key, value in values.items()
+        }
+        self.shared.set_many(envelopes, timeout)
+        for key, envelope in envelopes.items():
+            self.remember(key, envelope, now)
+
+    def acquire(self, key):
+        """Блокировка пересчёта key; False - её держит другой."""
+        acquired = self.shared.add(
+            LOCK_PREFIX + key, 1, settings.HOT_CACHE_LOCK_TIMEOUT
+        )
+        if not acquired:
+            self.count('lock_busy')
+        return acquired
+
+    def release(self, key):
+        self.shared.delete(LOCK_PREFIX + key)
+
+    def wait(self, key):
+        """Значение от держателя блокировки или None.
+
+        None - блокировка снята без значения или истекла: тогда
+        вызывающий считает сам.
+        """
+        self.count('waits')
+        lock_key = LOCK_PREFIX + key
+        deadline = time.monotonic() + settings.HOT_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_STEP)
+            found = self.shared.get_many([key, lock_key])
+            if key in found:
+                self.remember(key, found[key], time.time())
+                return found[key][0]
+            if lock_key not in found:
+                break
+        self.count('wait_timeouts')
+        return None
+
+    def get_or_set(self, key, compute, timeout, stale=0):
+        """Значение key, при необходимости - compute() один раз на ключ.
+
+        Пока один процесс пересчитывает, остальные получают прежнее
+        значение (если оно есть) или ждут.
+        """
+        value, refresh = self.lookup(key)
+        if not refresh:
+            return value
+        locked = self.acquire(key)
+        if not locked:
+            if value is not None:
+                self.count('stale_served')
+                return value
+            value = self.wait(key)
+            if value is not None:
+                return value
+        try:
+            start = time.perf_counter()
+            value = compute()
+            self.set(
+                key, value, timeout, stale, time.perf_counter() - start
+            )
+            self.count('computes')
+            return value
+        finally:
+            if locked:
+                self.release(key)
+
+    def clear_local(self):
+        """Очистка ближнего уровня и счётчиков (кеш Django не трогается)."""
+        self.local.clear()
+        with self.counters_lock:
+            self.counters.clear()
+
+    def stats(self):
+        """Счётчики процесса, заполненность LRU и доли попаданий."""
+        with self.counters_lock:
+            counters = dict(self.counters)
+        local_hits = counters.get('local_hits', 0)
+        hits = local_hits + counters.get('shared_hits', 0)
+        lookups = hits + counters.get('misses', 0)
+        return {
+            **counters,
+            'local_entries': len(self.local.entries),
+            'local_bytes': self.local.bytes,
+            'local_evictions': self.local.evictions,
+            'max_entries': settings.HOT_CACHE_MAX_ENTRIES,
+            'max_bytes': settings.HOT_CACHE_MAX_BYTES,
+            'local_hit_ratio': local_hits / lookups if lookups else None,
+            'hit_ratio': hits / lookups if lookups else None,
+        }
+
+
+hot_cache = TieredCache()
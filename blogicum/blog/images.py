@@ -0,0 +1,104 @@
+"""Уменьшенные копии (renditions) изображений постов.
+
+Для каждой загруженной картинки сохраняются копии нужной ширины
+в JPEG и WebP, а их пути и размеры - в Post.image_renditions, чтобы
+шаблоны строили srcset без обращения к файловой системе.
+"""
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import ImageStatus
+
+RENDITIONS_DIR = 'renditions'
+# Ширина карточки в ленте и на странице поста - 40rem (640px);
+# вторая копия нужна для экранов высокой плотности.
+WIDTHS = {'card': 640, 'detail': 1280}
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {
+        'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True
+    },
+}
+
+
+def needs_renditions(post):
+    """Копии не соответствуют текущему файлу поста."""
+    return (post.image.name or '') != post.image_renditions.get('source', '')
+
+
+def generate_renditions(post):
+    """Пересоздаёт копии изображения поста и сохраняет их описание."""
+    delete_renditions(post)
+    post.image_renditions = (
+        build_renditions(post.image) if post.image else {}
+    )
+    post.image_status = (
+        ImageStatus.READY if post.image else ImageStatus.NONE
+    )
+    post.save(update_fields=('image_renditions', 'image_status'))
+
+
+def build_renditions(image_field):
+    storage = image_field.storage
+    try:
+        with image_field.open('rb') as source:
+            with Image.open(source) as original:
+                original = ImageOps.exif_transpose(original).convert('RGB')
+    except OSError:
+        # Файла нет или это не изображение: шаблоны покажут оригинал.
+        return {'source': image_field.name, 'files': []}
+    stem = PurePosixPath(image_field.name).stem
+    files = []
+    for width in sorted({min(w, original.width) for w in WIDTHS.values()}):
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for extension, options in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            name = storage.save(
+                f'{RENDITIONS_DIR}/{stem}_{width}.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+            files.append({
+                'name': name,
+                'width': width,
+                'height': height,
+                'format': extension,
+            })
+    return {
+        'source': image_field.name,
+        'width': original.width,
+        'height': original.height,
+        'files': files,
+    }
+
+
+def delete_renditions(post):
+    storage = post.image.storage
+    for rendition in post.image_renditions.get('files', ()):
+        storage.delete(rendition['name'])
+
+
+def srcset(post, extension):
+    storage = post.image.storage
+    return ', '.join(
+        f'{storage.url(rendition["name"])} {rendition["width"]}w'
+        for rendition in post.image_renditions.get('files', ())
+        if rendition['format'] == extension
+    )
+
+
+def fallback(post, kind):
+    """Самая подходящая JPEG-копия для src, если srcset не поддержан."""
+    candidates = [
+        rendition
+        for rendition in post.image_renditions.get('files', ())
+        if rendition['format'] == 'jpg'
+        and rendition['width'] <= WIDTHS[kind]
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda rendition: rendition['width'])
@@ -0,0 +1,127 @@
+"""Очередь фоновой обработки фото в таблице ImageJob.
+
+Форма поста только сохраняет загруженный файл и ставит задание;
+копии строит команда process_image_jobs. Внешний брокер не нужен:
+задание забирается условным UPDATE, поэтому несколько потоков
+или процессов не возьмут одно и то же задание.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import images
+from .models import ImageJob, ImageStatus, Post
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(post):
+    """Ставит в очередь обработку текущего фото поста."""
+    Post.objects.filter(pk=post.pk).update(image_status=ImageStatus.PENDING)
+    post.image_status = ImageStatus.PENDING
+    ImageJob.objects.update_or_create(
+        post_id=post.pk,
+        source=post.image.name or '',
+        defaults={
+            'status': ImageJob.Status.PENDING,
+            'attempts': 0,
+            'run_after': timezone.now(),
+            'last_error': '',
+        },
+    )
+
+
+def enqueue_many(posts):
+    """Как enqueue, но для пачки постов: два запроса на всю пачку.
+
+    Уже стоящие задания на тот же файл не дублируются.
+    """
+    posts = [post for post in posts if images.needs_renditions(post)]
+    if not posts:
+        return
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+        image_status=ImageStatus.PENDING
+    )
+    ImageJob.objects.bulk_create(
+        (
+            ImageJob(post_id=post.pk, source=post.image.name or '')
+            for post in posts
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def claim():
+    """Забирает одно готовое к запуску задание или возвращает None.
+
+    Задания, зависшие в работе дольше IMAGE_JOB_LEASE секунд (например,
+    после падения обработчика), считаются снова свободными.
+    """
+    now = timezone.now()
+    ready = Q(status=ImageJob.Status.PENDING, run_after__lte=now) | Q(
+        status=ImageJob.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.IMAGE_JOB_LEASE),
+    )
+    for job_id in ImageJob.objects.filter(ready).values_list(
+        'pk', flat=True
+    )[:10]:
+        claimed = ImageJob.objects.filter(ready, pk=job_id).update(
+            status=ImageJob.Status.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ImageJob.objects.get(pk=job_id)
+    return None
+
+
+def run(job):
+    """Выполняет задание; повторный запуск безопасен."""
+    try:
+        post = Post.objects.get(pk=job.post_id)
+        # Файл уже заменён (для нового есть своё задание) или копии
+        # построены предыдущей попыткой - делать нечего.
+        if (post.image.name or '') == job.source and (
+            images.needs_renditions(post)
+        ):
+            images.generate_renditions(post)
+    except Post.DoesNotExist:
+        pass
+    except Exception as error:
+        logger.exception('Не удалось обработать фото: %s', job)
+        fail(job, error)
+        return False
+    job.status = ImageJob.Status.DONE
+    job.last_error = ''
+    job.save(update_fields=('status', 'last_error'))
+    return True
+
+
+def fail(job, error):
+    job.last_error = f'{type(error).__name__}: {error}'
+    if job.attempts < settings.IMAGE_JOB_MAX_ATTEMPTS:
+        job.status = ImageJob.Status.PENDING
+        job.run_after = timezone.now() + timedelta(
+            seconds=settings.IMAGE_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+    else:
+        job.status = ImageJob.Status.FAILED
+        Post.objects.filter(pk=job.post_id).update(
+            image_status=ImageStatus.FAILED
+        )
+    job.save(update_fields=('status', 'run_after', 'last_error'))
+
+
+def process(limit=None):
+    """Выполняет готовые задания, пока они есть; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        done += 1
+    return done
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.dumps import dump_models, serialize, to_json
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает пользователей, категории, места, посты и '
+        'комментарии в JSON Lines или JSON-массив (как dumpdata).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output', default='-',
+            help='Файл выгрузки; по умолчанию - стандартный вывод.'
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'json'), default='jsonl',
+            help='jsonl - запись на строку, json - массив, как db.json.'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, output, format, batch_size, **options):
+        if output == '-':
+            self.write_dump(sys.stdout, format, batch_size)
+            return
+        with open(output, 'w', encoding='utf-8') as stream:
+            self.write_dump(stream, format, batch_size)
+
+    def write_dump(self, stream, format, batch_size):
+        separator = '[\n' if format == 'json' else ''
+        for model in dump_models():
+            written = 0
+            for records in serialize(model, batch_size):
+                for record in records:
+                    stream.write(separator + to_json(record))
+                    separator = ',\n' if format == 'json' else '\n'
+                written += len(records)
+                self.stderr.write(
+                    f'{model._meta.verbose_name_plural}: {written}'
+                )
+        if format == 'json':
+            stream.write('\n]\n' if separator != '[\n' else '[]\n')
+        elif separator:
+            stream.write('\n')
@@ -0,0 +1,144 @@
+import json
+import sys
+from tempfile import TemporaryFile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.db import DatabaseError, connection, transaction
+
+from blog import jobs
+from blog.cache_versions import bump
+from blog.dumps import (
+    batched, deserialize, dump_models, iter_records, keep_dates
+)
+from blog.models import Category, Comment, Location, Post
+
+
+def version_keys(model, batch):
+    """Версии cache_versions, которые сбрасывает пачка объектов model.
+
+    Загруженные pk могли принадлежать удалённым объектам, чьи карточки
+    ещё лежат в кеше.
+    """
+    if model is Comment:
+        return {('post', obj.post_id) for obj in batch}
+    namespace = {
+        get_user_model(): 'user',
+        Category: 'category',
+        Location: 'location',
+        Post: 'post',
+    }[model]
+    return {(namespace, obj.pk) for obj in batch}
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает выгрузку export_blog или dumpdata (JSON Lines '
+        'или JSON-массив). Объекты добавляются через bulk_create в '
+        'порядке зависимостей, без сигналов на каждую строку; счётчики '
+        'комментариев и поисковый индекс пересчитываются в конце, '
+        'версии кеша сбрасываются пачками, фото ставятся в очередь '
+        'обработки. '
+        'Связи many-to-many (группы и права пользователей) не переносятся.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки; "-" - стандартный ввод.'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать объекты, pk которых уже заняты.'
+        )
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Не пересобирать поисковый индекс.'
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        models = dump_models()
+        spools = {model._meta.label_lower: TemporaryFile(
+            'w+', encoding='utf-8'
+        ) for model in models}
+        try:
+            self.spool(path, spools)
+            with transaction.atomic():
+                for model in models:
+                    self.load(
+                        model, spools[model._meta.label_lower], batch_size,
+                        options['ignore_conflicts'],
+                    )
+                self.reset_sequences(models)
+        except (DatabaseError, DeserializationError, ValueError) as error:
+            raise CommandError(f'Выгрузка не загружена: {error}')
+        finally:
+            for spool in spools.values():
+                spool.close()
+
+        call_command('recount_comments', stdout=self.stdout)
+        if not options['skip_search_index']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        # Ленты и ссылки на справочники - после пересчёта счётчиков.
+        bump(
+            ('feed', 'all'),
+            ('feed', 'refs'),
+            *(
+                ('category-feed', slug) for slug in
+                Category.objects.values_list('slug', flat=True)
+            ),
+        )
+
+    def spool(self, path, spools):
+        """Раскладывает записи по временным файлам моделей.
+
+        Выгрузка может идти в любом порядке моделей, а загружать их
+        нужно от независимых к зависимым.
+        """
+        skipped = 0
+        stream = (
+            sys.stdin if path == '-' else open(path, encoding='utf-8-sig')
+        )
+        try:
+            for record in iter_records(stream):
+                spool = spools.get(str(record.get('model', '')).lower())
+                if spool is None:
+                    skipped += 1
+                    continue
+                spool.write(json.dumps(record, ensure_ascii=False) + '\n')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        if skipped:
+            self.stdout.write(f'Пропущено записей других моделей: {skipped}')
+
+    def load(self, model, spool, batch_size, ignore_conflicts):
+        spool.seek(0)
+        records = (json.loads(line) for line in spool)
+        loaded = 0
+        with keep_dates(model) as date_fields:
+            objects = deserialize(records, date_fields)
+            for batch in batched(objects, batch_size):
+                model._base_manager.bulk_create(
+                    batch, batch_size=batch_size,
+                    ignore_conflicts=ignore_conflicts,
+                )
+                # Через шину инвалидации: кеши других процессов тоже.
+                bump(*version_keys(model, batch))
+                if model is Post:
+                    jobs.enqueue_many(batch)
+                loaded += len(batch)
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: {loaded}'
+                )
+
+    def reset_sequences(self, models):
+        """Автоинкремент продолжает нумерацию после загруженных pk."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
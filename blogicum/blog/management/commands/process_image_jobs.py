@@ -0,0 +1,66 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from blog import jobs
+
+
+class Command(BaseCommand):
+    help = 'Фоновая обработка фото постов из очереди ImageJob.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Число потоков-обработчиков.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Пауза (сек.) между проверками пустой очереди.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задания и завершиться.'
+        )
+
+    def handle(self, *args, workers, poll_interval, once, **options):
+        """Ctrl+C и SIGTERM останавливают обработчики между заданиями.
+
+        Сигналы получает только главный поток, поэтому он ждёт
+        обработчиков и передаёт им остановку через self.stopping.
+        """
+        self.stopping = threading.Event()
+        previous = signal.signal(
+            signal.SIGTERM, lambda *_: self.stopping.set()
+        )
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self.work, poll_interval, once)
+                    for _ in range(workers)
+                ]
+                try:
+                    wait(futures)
+                except KeyboardInterrupt:
+                    self.stopping.set()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        done = sum(future.result() for future in futures)
+        self.stdout.write(f'Обработано заданий: {done}')
+
+    def work(self, poll_interval, once):
+        done = 0
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                processed = jobs.process()
+                done += processed
+                if not processed:
+                    if once:
+                        break
+                    self.stopping.wait(poll_interval)
+            return done
+        finally:
+            connection.close()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс по всем постам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов индексировать за одну транзакцию.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        posts = Post.objects.only('title', 'text').order_by('pk')
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_posts(batch)
+            last_pk = batch[-1].pk
+            indexed += len(batch)
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
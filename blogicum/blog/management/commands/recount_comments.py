@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.cache_versions import bump
+from blog.models import Comment, Post
+from blog.signals import category_feeds
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comments_count, исправляя расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов исправлять за одну транзакцию.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+                'post'
+            ).annotate(total=Count('pk')).values('total')
+        ), 0)
+        drifted = list(Post.objects.annotate(actual=actual).exclude(
+            comments_count=F('actual')
+        ).order_by().values_list('pk', flat=True))
+
+        fixed = 0
+        for start in range(0, len(drifted), batch_size):
+            fixed += self.fix(drifted[start:start + batch_size], actual)
+        self.stdout.write(f'Исправлено постов: {fixed}')
+
+    def fix(self, pks, actual):
+        # Как change_comments_count: updated_at - для ETag лент, версии -
+        # для закешированных карточек и страниц.
+        with transaction.atomic():
+            fixed = Post.objects.filter(pk__in=pks).update(
+                comments_count=actual, updated_at=timezone.now()
+            )
+            bump(
+                *(('post', pk) for pk in pks),
+                ('feed', 'all'),
+                *category_feeds(posts__in=pks),
+            )
+        return fixed
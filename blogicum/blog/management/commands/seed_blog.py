@@ -0,0 +1,150 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.cache_versions import bump
+from blog.dumps import batched
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+WORDS = (
+    'город река горы поход путешествие утро вечер дорога лес море '
+    'фотография встреча история музей парк зима лето осень весна '
+    'дом друзья книга кофе поезд мост небо солнце дождь снег озеро'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для нагрузочных тестов '
+        '(bulk_create, без сигналов; счётчики и индексы пересчитываются '
+        'в конце).'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 100),
+            ('categories', 20),
+            ('locations', 50),
+            ('posts', 10000),
+            ('comments', 100000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько добавить: {name} (по умолчанию {default}).'
+            )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора: одинаковые данные '
+                 'для сравнимых прогонов.'
+        )
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Не пересобирать поисковый индекс.'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        tag = self.now.strftime('%Y%m%d%H%M%S')
+
+        users = self.insert(User, options['users'], lambda i: User(
+            username=f'seed{tag}_{i}', password='!'
+        ))
+        categories = self.insert(
+            Category, options['categories'], lambda i: Category(
+                title=f'Категория {i}',
+                description=self.text(10),
+                slug=f'seed-{tag}-{i}',
+                is_published=self.random.random() < 0.9,
+            )
+        )
+        locations = self.insert(
+            Location, options['locations'],
+            lambda i: Location(name=f'Место {i}'),
+            required=False,
+        )
+        posts = self.insert(
+            Post, options['posts'],
+            lambda i: self.new_post(users, categories, locations),
+            required=options['comments'] > 0,
+        )
+        self.insert(Comment, options['comments'], lambda i: Comment(
+            text=self.text(self.random.randint(3, 30)),
+            post_id=self.random.choice(posts),
+            author_id=self.random.choice(users),
+        ), required=False)
+
+        call_command('recount_comments', stdout=self.stdout)
+        if not options['skip_search_index']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        # Через шину инвалидации, как import_blog: новые категории и
+        # места увидят справочники всех процессов.
+        bump(
+            ('feed', 'all'),
+            ('feed', 'refs'),
+            *(('category', pk) for pk in categories),
+            *(('location', pk) for pk in locations),
+            *(
+                ('category-feed', slug) for slug in
+                Category.objects.values_list('slug', flat=True)
+            ),
+        )
+
+    def insert(self, model, count, build, required=True):
+        """Добавляет count объектов пачками.
+
+        Возвращает pk, из которых выбираются связи следующих моделей:
+        диапазон новых строк (bulk_create в SQLite не возвращает pk,
+        а при одном пишущем процессе они идут подряд) или, если новых
+        нет, уже существующие.
+        """
+        first = self.max_pk(model) + 1
+        for batch in batched(map(build, range(count)), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: +{count}')
+        if count:
+            return range(first, self.max_pk(model) + 1)
+        existing = list(model.objects.values_list('pk', flat=True))
+        if not existing and required:
+            raise CommandError(
+                f'Нет ни одного объекта {model.__name__}: '
+                'их нужно создать для связей.'
+            )
+        return existing
+
+    def new_post(self, users, categories, locations):
+        post = Post(
+            title=self.text(4).capitalize(),
+            text=self.text(self.random.randint(20, 120)),
+            pub_date=self.now - timedelta(
+                minutes=self.random.randint(-60 * 24, 60 * 24 * 365)
+            ),
+            is_published=self.random.random() < 0.95,
+            author_id=self.random.choice(users),
+            category_id=self.random.choice(categories),
+            location_id=(
+                self.random.choice(locations)
+                if locations and self.random.random() < 0.7 else None
+            ),
+        )
+        # bulk_create не вызывает save(), где считается анонс.
+        post.update_excerpt()
+        return post
+
+    @staticmethod
+    def max_pk(model):
+        return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words))
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.16 on 2026-10-18 16:57
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+import snowballstemmer
+
+# Копия blog.search.terms на момент миграции: код приложения может
+# измениться, а миграция должна работать как прежде.
+WORD_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+stemmer = snowballstemmer.stemmer('russian')
+
+
+def terms(text):
+    return {
+        term for term in (
+            stemmer.stemWord(word)[:MAX_TERM_LENGTH]
+            for word in set(WORD_RE.findall(text.lower()))
+        )
+        if term
+    }
+
+
+def index_existing_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    SearchEntry = apps.get_model('blog', 'SearchEntry')
+    posts = Post.objects.values_list('pk', 'title', 'text')
+    SearchEntry.objects.bulk_create(
+        (
+            SearchEntry(post_id=pk, term=term)
+            for pk, title, text in posts.iterator()
+            for term in terms(f'{title} {text}')
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'запись поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='search_entry_unique_term'),
+        ),
+        migrations.RunPython(
+            index_existing_posts, migrations.RunPython.noop
+        ),
+    ]
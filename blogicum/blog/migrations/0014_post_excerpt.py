@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+# Копия blog.models.make_excerpt на момент миграции.
+EXCERPT_WORDS = 60
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS)
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.only('text').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        for post in batch:
+            post.excerpt = make_excerpt(post.text)
+        Post.objects.bulk_update(batch, ('excerpt',))
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
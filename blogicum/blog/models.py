@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.text import Truncator
 
 from core.models import PublishedModel
 from blog.querysets import PersonManager
@@ -7,6 +9,14 @@ from blog.querysets import PersonManager
 
 User = get_user_model()
 
+# Слов в анонсе: столько выводит описание записи RSS/Atom, карточка
+# поста обрезает анонс ещё сильнее.
+EXCERPT_WORDS = 60
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS)
+
 
 class Category(PublishedModel):
     title = models.CharField(max_length=256,
@@ -39,6 +49,13 @@ class Location(PublishedModel):
         return self.name
 
 
+class ImageStatus(models.TextChoices):
+    NONE = '', 'Нет фото'
+    PENDING = 'pending', 'Обрабатывается'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка обработки'
+
+
 class Post(PublishedModel):
     title = models.CharField(max_length=256, verbose_name='Название')
     text = models.TextField(verbose_name='Текст')
@@ -61,6 +78,21 @@ class Post(PublishedModel):
                                  null=True,
                                  verbose_name='Категория')
     image = models.ImageField('Фото', blank=True)
+    image_renditions = models.JSONField('Копии фото',
+                                        default=dict,
+                                        blank=True,
+                                        editable=False)
+    comments_count = models.PositiveIntegerField('Комментариев',
+                                                 default=0,
+                                                 editable=False)
+    excerpt = models.TextField('Анонс', blank=True, editable=False)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    image_status = models.CharField('Обработка фото',
+                                    max_length=16,
+                                    choices=ImageStatus.choices,
+                                    default=ImageStatus.NONE,
+                                    blank=True,
+                                    editable=False)
     objects = PersonManager()
 
     class Meta:
@@ -68,9 +100,82 @@ class Post(PublishedModel):
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True),
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('comments_count', 'pub_date'),
+                condition=models.Q(is_published=True),
+                name='post_activity_feed_idx'
+            ),
+        )
 
     def comment_count(self):
-        return self.comments.count()
+        return self.comments_count
+
+    def update_excerpt(self):
+        """Анонс хранится рядом с текстом: ленты не загружают text
+        (см. FilteredQuerySet.for_feed).
+        """
+        self.excerpt = make_excerpt(self.text)
+
+    def save(self, *args, **kwargs):
+        """Счётчик комментариев меняют только атомарные UPDATE.
+
+        Иначе сохранение формы или админки записало бы значение,
+        прочитанное до появления новых комментариев.
+        """
+        update_fields = kwargs.get('update_fields')
+        if 'text' not in self.get_deferred_fields() and (
+            update_fields is None or 'text' in update_fields
+        ):
+            self.update_excerpt()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        if (
+            self.pk is not None
+            and not self._state.adding
+            and update_fields is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comments_count'
+            ]
+        super().save(*args, **kwargs)
+
+    def is_published_at(self, now=None):
+        """Пост опубликован и виден всем на момент now.
+
+        Категория берётся из уже загруженного объекта, поэтому при
+        select_related('category') или with_references() проверка не
+        делает запросов.
+        """
+        return (
+            self.is_published
+            and self.pub_date <= (now or timezone.now())
+            and self.category_id is not None
+            and self.category.is_published
+        )
+
+    def is_visible_to(self, user, now=None):
+        """Может ли пользователь открыть пост (см. visible_to)."""
+        return (
+            user.is_superuser
+            or self.author_id == user.pk
+            or self.is_published_at(now)
+        )
 
     def __str__(self):
         return self.title
@@ -94,3 +199,87 @@ class Comment(PublishedModel):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+        )
+
+
+class ImageJob(models.Model):
+    """Задание фоновому обработчику на копии фото поста.
+
+    Задание привязано к конкретному файлу (source): повторная постановка
+    того же файла не создаёт дубликат, а задание для уже заменённого
+    файла завершается без работы.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнено'
+        FAILED = 'failed', 'Ошибка'
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация'
+    )
+    source = models.CharField('Файл', max_length=256, blank=True)
+    status = models.CharField('Статус',
+                              max_length=16,
+                              choices=Status.choices,
+                              default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+    locked_at = models.DateTimeField('Взято в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        ordering = ('run_after',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'source'), name='image_job_unique_source'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'), name='image_job_queue_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.source} ({self.get_status_display()})'
+
+
+class SearchEntry(models.Model):
+    """Строка обратного индекса поиска: основа слова -> пост.
+
+    Заполняется blog.search при сохранении поста; удаляется вместе
+    с постом.
+    """
+
+    term = models.CharField('Основа слова', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name='Публикация'
+    )
+
+    class Meta:
+        verbose_name = 'запись поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'), name='search_entry_unique_term'
+            ),
+        )
+
+    def __str__(self):
+        return self.term
@@ -0,0 +1,24 @@
+from django.http import Http404
+
+
+class CachedObjectMixin:
+    """Объект представления загружается один раз за запрос.
+
+    get_object() вызывают проверка прав, обработка отказа, сборка
+    контекста и сами DeleteView/UpdateView; все они получают один и тот
+    же экземпляр (или тот же Http404). Запросы с явно переданным
+    queryset не кешируются.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset=queryset)
+        if not hasattr(self, '_object_lookup'):
+            try:
+                self._object_lookup = (super().get_object(), None)
+            except Http404 as error:
+                self._object_lookup = (None, error)
+        obj, error = self._object_lookup
+        if error is not None:
+            raise error
+        return obj
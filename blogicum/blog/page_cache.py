@@ -0,0 +1,223 @@
+import hashlib
+import json
+import math
+import re
+import time
+
+from django.conf import settings
+from django.template import RequestContext, engines
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from .cache_versions import get_versions
+from .conditional import conditional_response
+from .hot_cache import hot_cache
+from .references import REFS, check_references
+
+# Пользовательский текст на страницах экранируется, поэтому
+# подделать метку в нём нельзя: '<' превращается в '&lt;'.
+HOLE = re.compile(r'<!--hole:([\w/.-]+):(\{[^<>]*\})-->')
+AUTHOR_ONLY = re.compile(r'<!--author:(\d+)-->(.*?)<!--/author-->', re.S)
+
+
+def hole_marker(template_name, params):
+    """Метка личного фрагмента в общей версии страницы."""
+    params = json.dumps(params, separators=(',', ':'), sort_keys=True)
+    return f'<!--hole:{template_name}:{params}-->'
+
+
+def author_only_marker(author_id, content):
+    """Часть общей версии страницы, которую увидит только автор."""
+    return f'<!--author:{author_id}-->{content}<!--/author-->'
+
+
+def fill_holes(content, request):
+    """Страница content с фрагментами для request.user вместо меток.
+
+    Блоки автора только вырезаются или остаются, без рендеринга.
+    Для фрагментов {% hole %} контекстные процессоры выполняются
+    один раз на страницу, шаблон каждого загружается один раз.
+    """
+    user_id = str(request.user.pk)
+    content = AUTHOR_ONLY.sub(
+        lambda match: match.group(2) if match.group(1) == user_id else '',
+        content,
+    )
+    first = HOLE.search(content)
+    if first is None:
+        return content
+    engine = engines['django'].engine
+    templates = {}
+
+    def get_template(name):
+        if name not in templates:
+            templates[name] = engine.get_template(name)
+        return templates[name]
+
+    def render(match):
+        with context.push(json.loads(match.group(2))):
+            return get_template(match.group(1)).render(context)
+
+    context = RequestContext(request)
+    with context.bind_template(get_template(first.group(1))):
+        return HOLE.sub(render, content)
+
+
+class PageCacheMixin:
+    """Кеш целых страниц.
+
+    Ключ страницы содержит версии объектов, от которых она зависит
+    (get_page_dependencies), поэтому запись в модель сбрасывает ровно
+    эти страницы. Срок жизни не превышает времени до ближайшей
+    отложенной публикации (get_next_publication), чтобы она появилась
+    вовремя.
+
+    Анонимам страница отдаётся из кеша целиком. Для вошедших
+    пользователей хранится одна общая версия: личные части в ней
+    заменены метками ({% hole %} - имя в шапке, токен CSRF;
+    {% for_author %} - кнопки автора), которые заполняются при каждой
+    выдаче. Общую версию видят только вошедшие, поэтому проверки
+    user.is_authenticated в ней верны для всех. Она сохраняется, только
+    если страницу видят все (is_page_public).
+
+    Страницы хранятся в hot_cache: популярную страницу пересчитывают
+    заранее и только в одном процессе, остальные ждут его результата.
+    """
+
+    page_cache_timeout = None
+
+    def get_page_dependencies(self):
+        raise NotImplementedError(
+            'Укажите, от каких объектов зависит страница.'
+        )
+
+    def get_next_publication(self):
+        return None
+
+    def get_page_cache_timeout(self):
+        timeout = self.page_cache_timeout or settings.PAGE_CACHE_TIMEOUT
+        next_publication = self.get_next_publication()
+        if next_publication is not None:
+            until = (next_publication - timezone.now()).total_seconds()
+            timeout = max(1, min(timeout, math.ceil(until)))
+        return timeout
+
+    def is_page_public(self):
+        """Страница одинакова для всех, кроме личных частей."""
+        return True
+
+    def uses_page_holes(self):
+        return self.request.user.is_authenticated
+
+    def get_page_cache_key(self):
+        dependencies = self.get_page_dependencies()
+        versions = get_versions(*dependencies)
+        if REFS in versions:
+            # Страница рендерится справочниками той же версии.
+            check_references(versions[REFS])
+        url = hashlib.md5(
+            self.request.get_full_path().encode()
+        ).hexdigest()
+        variant = 'shared' if self.uses_page_holes() else 'anonymous'
+        return f'blog:page:{variant}:{url}:' + ':'.join(
+            versions[key] for key in dependencies
+        )
+
+    def is_page_cacheable(self, request):
+        return request.method in ('GET', 'HEAD') and (
+            settings.PAGE_CACHE_FOR_USERS
+            or not request.user.is_authenticated
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_holes'] = (
+            self.is_page_cacheable(self.request) and self.uses_page_holes()
+        )
+        return context
+
+    def lookup_cached_page(self):
+        """Ключ страницы и ответ из кеша (или None).
+
+        Кеш читается один раз за запрос: асинхронные представления
+        проверяют его до запуска запросов к БД. None означает, что
+        страницу рендерит этот запрос: он взял блокировку ключа или
+        не дождался того, кто её держит.
+        """
+        if not hasattr(self, '_page_cache_lookup'):
+            key = self.get_page_cache_key()
+            response, refresh = hot_cache.lookup(key)
+            self._page_cache_locked = False
+            if refresh:
+                self._page_render_started = time.perf_counter()
+                if hot_cache.acquire(key):
+                    self._page_cache_locked = True
+                    response = None
+                elif response is None:
+                    response = hot_cache.wait(key)
+            self._page_cache_lookup = (key, response)
+        return self._page_cache_lookup
+
+    def release_page_cache_lock(self):
+        if getattr(self, '_page_cache_locked', False):
+            self._page_cache_locked = False
+            hot_cache.release(self._page_cache_lookup[0])
+
+    def personalize_etag(self, response):
+        """Свой для каждого пользователя ETag общей версии страницы."""
+        etag = response.get('ETag')
+        if etag is not None:
+            user = self.request.user
+            raw = f'{etag}:{user.pk}:{user.username}'
+            response['ETag'] = quote_etag(
+                hashlib.md5(raw.encode()).hexdigest()
+            )
+
+    def fill_page_holes(self, response):
+        response.content = fill_holes(
+            response.content.decode(response.charset), self.request
+        )
+
+    def get_cached_response(self):
+        """Ответ из кеша для текущего пользователя (или None)."""
+        _, response = self.lookup_cached_page()
+        if response is None:
+            return None
+        if not self.uses_page_holes():
+            return conditional_response(self.request, response)
+        self.personalize_etag(response)
+        checked = conditional_response(self.request, response)
+        if checked is response:
+            self.fill_page_holes(response)
+        return checked
+
+    def cache_rendered_page(self, key, response):
+        if not response.cookies and self.is_page_public():
+            hot_cache.set(
+                key, response, self.get_page_cache_timeout(),
+                delta=time.perf_counter() - self._page_render_started,
+            )
+        self.release_page_cache_lock()
+        if self.uses_page_holes():
+            self.personalize_etag(response)
+            self.fill_page_holes(response)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        response = self.get_cached_response()
+        if response is not None:
+            return response
+        key, _ = self.lookup_cached_page()
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except BaseException:
+            self.release_page_cache_lock()
+            raise
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: self.cache_rendered_page(key, rendered)
+            )
+        else:
+            self.release_page_cache_lock()
+        return response
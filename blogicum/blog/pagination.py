@@ -0,0 +1,178 @@
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+NEXT = 'n'
+PREVIOUS = 'p'
+SEPARATOR = '|'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    """Страница ленты без номера: знает только соседние курсоры."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по упорядоченному набору уникальных полей.
+
+    Вместо OFFSET и COUNT(*) страница выбирается условием
+    «строго после (или до) последней показанной строки», поэтому
+    глубокие страницы стоят столько же, сколько первая.
+    Последнее поле ordering должно быть уникальным (обычно pk).
+    """
+
+    is_cursor = True
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-pk')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def page(self, cursor=None):
+        direction, values = self.decode_cursor(cursor)
+        rows = list(self.page_queryset(direction, values))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows, self, None, None)
+        first, last = rows[0], rows[-1]
+        has_next = has_more if direction == NEXT else True
+        has_previous = (
+            has_more if direction == PREVIOUS else values is not None
+        )
+        return CursorPage(
+            rows,
+            self,
+            self.encode_cursor(NEXT, last) if has_next else None,
+            self.encode_cursor(PREVIOUS, first) if has_previous else None,
+        )
+
+    def page_queryset(self, direction=NEXT, values=None):
+        """Неисполненный запрос страницы (с одной лишней строкой)."""
+        ordering = self.ordering
+        if direction == PREVIOUS:
+            ordering = tuple(self._reverse(name) for name in ordering)
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+        return queryset[:self.per_page + 1]
+
+    def encode_cursor(self, direction, obj):
+        values = [
+            self._field(name).value_to_string(obj) for name in self.fields
+        ]
+        raw = SEPARATOR.join([direction, *values])
+        return urlsafe_base64_encode(force_bytes(raw))
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return NEXT, None
+        try:
+            direction, *raw = (
+                urlsafe_base64_decode(cursor).decode().split(SEPARATOR)
+            )
+            if direction not in (NEXT, PREVIOUS) or (
+                len(raw) != len(self.fields)
+            ):
+                raise ValueError(cursor)
+            values = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, raw)
+            ]
+        except (ValueError, UnicodeDecodeError, ValidationError) as error:
+            raise InvalidCursor(cursor) from error
+        return direction, values
+
+    def _after(self, ordering, values):
+        """Условие «строка идёт после values» для ordering.
+
+        Для полей (a, b) это a <= x AND (a < x OR (a = x AND b < y)):
+        ведущее нестрогое сравнение даёт диапазон по индексу.
+        """
+        names = [name.lstrip('-') for name in ordering]
+        lookups = ['lt' if name.startswith('-') else 'gt' for name in ordering]
+        condition = Q()
+        for i in reversed(range(len(names))):
+            strict = Q(**{f'{names[i]}__{lookups[i]}': values[i]})
+            if i == len(names) - 1:
+                condition = strict
+            else:
+                condition = strict | (
+                    Q(**{names[i]: values[i]}) & condition
+                )
+        leading = Q(**{f'{names[0]}__{lookups[0]}e': values[0]})
+        return leading & condition
+
+    def _field(self, name):
+        meta = self.queryset.model._meta
+        return meta.pk if name == 'pk' else meta.get_field(name)
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+
+class CursorPaginationMixin:
+    """Курсорная пагинация для ListView.
+
+    Первая страница и ссылки ?cursor= обслуживаются CursorPaginator;
+    старые ссылки вида ?page=N продолжают работать через обычный
+    Paginator.
+    """
+
+    cursor_kwarg = 'cursor'
+    cursor_ordering = ('-pub_date', '-pk')
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        if (
+            self.page_kwarg in self.request.GET
+            and self.cursor_kwarg not in self.request.GET
+        ):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset, page_size, self.get_cursor_ordering()
+        )
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Неверная ссылка на страницу.')
+        return paginator, page, page.object_list, page.has_other_pages()
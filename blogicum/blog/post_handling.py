@@ -1,31 +1,51 @@
 from django.http import Http404
 from django.views.generic.detail import SingleObjectMixin
 
+from .models import Comment
+from .object_handling import CachedObjectMixin
+from .pagination import CursorPaginator, InvalidCursor
 
-class PostAccessMixin(SingleObjectMixin):
+COMMENTS_PAGINATION = 20
+
+
+class PostAccessMixin(CachedObjectMixin, SingleObjectMixin):
+
+    def get_queryset(self):
+        return super().get_queryset().with_references()
 
     def get_object(self, queryset=None):
         self.post = super().get_object(queryset=queryset)
-        if queryset is None:
-            queryset = self.model.objects
-        if (
-            (self.post not in queryset.get_all_posts().is_published())
-            and (
-                not self.request.user.is_superuser
-            ) and (
-                self.post.author != self.request.user
-            )
-        ):
+        if not self.post.is_visible_to(self.request.user):
             raise Http404('Страница не найдена')
         return self.post
 
 
 class PostContextData:
+    """Пост и порция его комментариев по ?cursor=.
+
+    Комментарии идут в порядке создания вместе с авторами; следующую
+    порцию отдаёт PostCommentsView.
+    """
+
+    comments_cursor_kwarg = 'cursor'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         post = self.get_object()
-        context['comments'] = post.comments.all()
+        context['comments'] = self.get_comments_page(post.pk)
         context['post_id'] = post.id
         context['post'] = post
         return context
+
+    def get_comments_page(self, post_id):
+        paginator = CursorPaginator(
+            Comment.objects.filter(post_id=post_id).select_related('author'),
+            COMMENTS_PAGINATION,
+            ordering=('created_at', 'pk'),
+        )
+        try:
+            return paginator.page(
+                self.request.GET.get(self.comments_cursor_kwarg)
+            )
+        except InvalidCursor:
+            raise Http404('Неверная ссылка на комментарии.')
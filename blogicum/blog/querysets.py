@@ -1,15 +1,72 @@
 from django.db import models
+from django.db.models.query import ModelIterable
 from django.utils import timezone
 
 
+def published_category_ids():
+    """Опубликованные категории из справочника процесса.
+
+    Условие category__in вместо category__is_published не делает JOIN
+    с таблицей категорий. Модуль references импортирует модели, поэтому
+    импорт отложен.
+    """
+    from .references import categories
+    return categories.published_ids()
+
+
+class ReferencesIterable(ModelIterable):
+    """Посты с категорией и местом из справочников (см. references)."""
+
+    def __iter__(self):
+        from .references import attach_references
+        for post in super().__iter__():
+            attach_references((post,))
+            yield post
+
+
 class FilteredQuerySet(models.QuerySet):
 
-    def is_published(self):
+    def is_published(self, now=None):
         return self.filter(
             is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True
+            pub_date__lte=now or timezone.now(),
+            category__in=published_category_ids()
+        )
+
+    def visible_to(self, user, now=None):
+        """Посты, которые пользователь может открыть.
+
+        Условие совпадает с Post.is_visible_to: опубликованные посты
+        видны всем, неопубликованные - автору и администратору.
+        """
+        if user.is_superuser:
+            return self
+        published = models.Q(
+            is_published=True,
+            pub_date__lte=now or timezone.now(),
+            category__in=published_category_ids()
         )
+        if user.is_authenticated:
+            return self.filter(published | models.Q(author=user))
+        return self.filter(published)
+
+    def with_references(self):
+        """Категория и место берутся из справочников, без JOIN."""
+        clone = self._chain()
+        clone._iterable_class = ReferencesIterable
+        return clone
+
+    def for_feed(self):
+        """Режим ленты: всё, что выводит карточка поста, одним запросом.
+
+        Полный текст ленте не нужен: карточка и RSS выводят анонс.
+        Категория и место берутся из справочников процесса.
+        """
+        return self.select_related('author').with_references().defer('text')
+
+    def by_activity(self):
+        """Сначала самые обсуждаемые (по хранимому счётчику)."""
+        return self.order_by('-comments_count', '-pub_date', '-pk')
 
     def all_posts(self):
         return self
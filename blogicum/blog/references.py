@@ -0,0 +1,166 @@
+"""Справочники в памяти процесса: категории и местоположения.
+
+Таблицы маленькие и меняются редко, а нужны почти каждому запросу:
+видимость поста зависит от опубликованности категории, карточка
+выводит категорию и место. Процесс держит все их строки в памяти (по
+pk и по slug) и перечитывает таблицу целиком при первом обращении
+после изменения. Чего нет в памяти, читается из БД как раньше.
+
+Об изменении справочник узнаёт из шины инвалидации (события
+'category' и 'location', см. core.invalidation). Событие другого
+процесса приходит с задержкой, поэтому страницы и карточки, которые
+кладут HTML в общий кеш, ещё сверяют версию ('feed', 'refs') - с
+расходящейся версией справочник перечитывается. Без событий он живёт
+не дольше REFERENCE_CACHE_TIMEOUT.
+
+Объекты справочника общие для всех потоков: их нельзя изменять.
+"""
+import itertools
+import threading
+import time
+
+from django.conf import settings
+
+from core.invalidation import bus
+
+from .cache_versions import get_versions
+from .models import Category, Location, Post
+
+REFS = ('feed', 'refs')
+
+
+class Snapshot:
+    """Строки таблицы, прочитанные одним запросом."""
+
+    def __init__(self, generation, refs_version, objects, slug_field):
+        self.generation = generation
+        self.refs_version = refs_version
+        self.expires_at = time.monotonic() + settings.REFERENCE_CACHE_TIMEOUT
+        self.by_pk = {obj.pk: obj for obj in objects}
+        self.by_slug = {
+            getattr(obj, slug_field): obj for obj in objects
+        } if slug_field else {}
+        self.published_ids = tuple(
+            obj.pk for obj in objects if obj.is_published
+        )
+
+
+class Registry:
+    """Все строки model в памяти процесса, по pk и по slug_field.
+
+    Событие шины только меняет номер поколения; таблицу перечитывает
+    первый запрос после него, один на процесс.
+    """
+
+    def __init__(self, model, namespace, slug_field=None):
+        self.model = model
+        self.namespace = namespace
+        self.slug_field = slug_field
+        self.lock = threading.Lock()
+        self.generations = itertools.count(1)
+        self.generation = 0
+        self.snapshot = None
+        bus.subscribe(self.on_event)
+
+    def on_event(self, namespace, pk, version):
+        if namespace in (self.namespace, None):
+            self.invalidate()
+
+    def invalidate(self):
+        self.generation = next(self.generations)
+
+    def is_fresh(self, snapshot):
+        return (
+            snapshot is not None
+            and snapshot.generation == self.generation
+            and time.monotonic() < snapshot.expires_at
+        )
+
+    def current(self):
+        snapshot = self.snapshot
+        if self.is_fresh(snapshot):
+            return snapshot
+        with self.lock:
+            if not self.is_fresh(self.snapshot):
+                # Поколение и версия берутся до чтения таблицы: событие,
+                # пришедшее во время чтения, снова сделает её старой.
+                generation = self.generation
+                refs_version = get_versions(REFS)[REFS]
+                self.snapshot = Snapshot(
+                    generation,
+                    refs_version,
+                    list(self.model.objects.all()),
+                    self.slug_field,
+                )
+            return self.snapshot
+
+    def check(self, refs_version):
+        """False - справочник прочитан при другой версии ('feed', 'refs').
+
+        Тогда он перечитывается при следующем обращении.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.refs_version != refs_version:
+            self.invalidate()
+            return False
+        return True
+
+    def get(self, pk):
+        """Объект по pk или None; чего нет в памяти, ищется в БД."""
+        obj = self.current().by_pk.get(pk)
+        if obj is None and pk is not None:
+            obj = self.model.objects.filter(pk=pk).first()
+        return obj
+
+    def get_by_slug(self, slug):
+        obj = self.current().by_slug.get(slug)
+        if obj is None:
+            obj = self.model.objects.filter(
+                **{self.slug_field: slug}
+            ).first()
+        return obj
+
+    def published_ids(self):
+        return self.current().published_ids
+
+
+categories = Registry(Category, 'category', slug_field='slug')
+locations = Registry(Location, 'location')
+
+POST_REFERENCES = (
+    (Post.category.field, categories),
+    (Post.location.field, locations),
+)
+
+
+def check_references(refs_version):
+    """Сверка справочников с версией ('feed', 'refs') из кеша Django."""
+    return all([
+        registry.check(refs_version) for _, registry in POST_REFERENCES
+    ])
+
+
+def attach_references(posts, replace=False):
+    """Категория и место постов из справочников, без запросов к БД.
+
+    Уже загруженные объекты остаются, если не указано replace. Если
+    объекта нет в памяти, пост загрузит его сам при обращении.
+    """
+    for field, registry in POST_REFERENCES:
+        by_pk = registry.current().by_pk
+        for post in posts:
+            if replace or not field.is_cached(post):
+                obj = by_pk.get(getattr(post, field.attname))
+                if obj is not None:
+                    field.set_cached_value(post, obj)
+
+
+def refresh_references(posts, versions):
+    """Перед записью HTML постов в общий кеш под версиями versions.
+
+    Если справочник прочитан до последнего изменения, объекты постов
+    заменяются свежими, иначе старое название категории сохранилось
+    бы под новой версией.
+    """
+    if not check_references(versions[REFS]):
+        attach_references(posts, replace=True)
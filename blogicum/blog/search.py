@@ -0,0 +1,62 @@
+"""Полнотекстовый поиск по заголовкам и текстам постов.
+
+Обратный индекс хранится в таблице SearchEntry: для каждого поста -
+множество основ слов (snowball-стеммер для русского языка), так что
+«публикации» находит «публикация». Запрос из нескольких слов ищет
+посты, содержащие все слова.
+"""
+import re
+import threading
+from functools import lru_cache
+
+import snowballstemmer
+
+from .models import SearchEntry
+
+WORD_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = SearchEntry._meta.get_field('term').max_length
+
+stemmer = snowballstemmer.stemmer('russian')
+# Стеммер хранит состояние в себе и не годится для нескольких потоков.
+stemmer_lock = threading.Lock()
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    with stemmer_lock:
+        return stemmer.stemWord(word)[:MAX_TERM_LENGTH]
+
+
+def terms(text):
+    """Множество основ слов text; каждое слово стеммится один раз."""
+    return {
+        term for term in map(stem, set(WORD_RE.findall(text.lower())))
+        if term
+    }
+
+
+def post_terms(post):
+    return terms(f'{post.title} {post.text}')
+
+
+def index_posts(posts):
+    """Пересобирает записи индекса для posts."""
+    posts = list(posts)
+    SearchEntry.objects.filter(post__in=[post.pk for post in posts]).delete()
+    SearchEntry.objects.bulk_create(
+        SearchEntry(term=term, post_id=post.pk)
+        for post in posts
+        for term in post_terms(post)
+    )
+
+
+def search(queryset, query):
+    """Посты queryset, содержащие все слова query."""
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    for term in words:
+        queryset = queryset.filter(
+            pk__in=SearchEntry.objects.filter(term=term).values('post')
+        )
+    return queryset
@@ -0,0 +1,210 @@
+"""Сброс закешированных карточек и страниц при изменении данных.
+
+Ключи кеша содержат версии объектов (см. cache_versions), поэтому
+обработчики только меняют версии затронутых объектов:
+    ('post', id) - карточка и страница поста;
+    ('feed', 'all') - главная лента;
+    ('category-feed', slug) - лента категории;
+    ('feed', 'refs') - всё, что выводит категории, места и авторов.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import images, jobs, search
+from .cache_versions import bump
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+
+class DeletingPosts(threading.local):
+    """pk постов, которые удаляются в текущей транзакции.
+
+    Удаление поста (или его автора) каскадом удаляет комментарии, и
+    обработка каждого из них (версии, счётчик) не нужна: пост сбросит
+    свои версии сам. Набор привязан к транзакции отметкой в on_commit:
+    после отката отметки нет в connection.run_on_commit, и набор
+    считается пустым.
+    """
+
+    def __init__(self):
+        self.pks = set()
+        self.marker = None
+
+    def is_current(self):
+        return self.marker is not None and any(
+            func is self.marker for _, func in connection.run_on_commit
+        )
+
+    def add(self, pk):
+        if not self.is_current():
+            self.pks = set()
+            self.marker = lambda: None
+            transaction.on_commit(self.marker)
+        self.pks.add(pk)
+
+    def discard(self, pk):
+        self.pks.discard(pk)
+
+    def __contains__(self, pk):
+        return pk in self.pks and self.is_current()
+
+
+deleting_posts = DeletingPosts()
+
+
+def category_feeds(**filters):
+    return [
+        ('category-feed', slug) for slug in
+        Category.objects.filter(**filters).values_list('slug', flat=True)
+    ]
+
+
+def loaded_value(instance, attname):
+    """Значение поля из загруженной строки; None - поле отложено.
+
+    Обращение к отложенному полю (only(), defer()) в post_init стоило
+    бы отдельного запроса на каждый объект.
+    """
+    return instance.__dict__.get(attname)
+
+
+@receiver(post_init, sender=Post)
+def remember_category(sender, instance, **kwargs):
+    instance._loaded_category_id = loaded_value(instance, 'category_id')
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    deleting_posts.add(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    category_ids = {instance.category_id, instance._loaded_category_id}
+    bump(
+        ('post', instance.pk),
+        ('feed', 'all'),
+        *category_feeds(pk__in=category_ids - {None}),
+    )
+    instance._loaded_category_id = instance.category_id
+    deleting_posts.discard(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts:
+        return
+    bump(
+        ('post', instance.post_id),
+        ('feed', 'all'),
+        *category_feeds(posts=instance.post_id),
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    bump(('category', instance.pk), ('feed', 'refs'))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def location_changed(sender, instance, **kwargs):
+    bump(('location', instance.pk), ('feed', 'refs'))
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._loaded_username = loaded_value(instance, 'username')
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    """Карточки показывают только username: прочие правки не важны.
+
+    Если username не загружался, он считается изменённым.
+    """
+    if created:
+        bump(('user', instance.pk))
+    elif instance.username != instance._loaded_username:
+        bump(('user', instance.pk), ('feed', 'refs'))
+    instance._loaded_username = instance.username
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, **kwargs):
+    """Копии фото строит фоновый обработчик (см. jobs)."""
+    if images.needs_renditions(instance):
+        jobs.enqueue(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_image_deleted(sender, instance, **kwargs):
+    images.delete_renditions(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_reindexed(sender, instance, update_fields, **kwargs):
+    """Индекс поиска обновляется, только если изменялся текст.
+
+    Записи удалённого поста удаляет каскад по внешнему ключу.
+    """
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        search.index_posts([instance])
+
+
+@receiver(post_init, sender=Comment)
+def remember_post(sender, instance, **kwargs):
+    instance._loaded_post_id = loaded_value(instance, 'post_id')
+
+
+@receiver(post_save, sender=Comment)
+def comment_counted(sender, instance, created, **kwargs):
+    """Post.comments_count меняется UPDATE ... SET n = n + 1.
+
+    Обработчик выполняется в транзакции сохранения комментария
+    (create_comment, админка), поэтому счётчик и строка комментария
+    фиксируются вместе. Комментарий, загруженный без post_id, считается
+    не перенесённым.
+    """
+    moved_from = instance._loaded_post_id
+    if created:
+        change_comments_count(instance.post_id, 1)
+    elif moved_from is not None and moved_from != instance.post_id:
+        change_comments_count(moved_from, -1)
+        change_comments_count(instance.post_id, 1)
+    instance._loaded_post_id = instance.post_id
+
+
+@receiver(post_delete, sender=Comment)
+def comment_uncounted(sender, instance, **kwargs):
+    """Срабатывает и для CommentDeleteView, и для массового удаления.
+
+    Комментарии удаляемого поста не пересчитываются.
+    """
+    if instance.post_id not in deleting_posts:
+        change_comments_count(instance.post_id, -1)
+
+
+def change_comments_count(post_id, delta):
+    # updated_at меняется вместе со счётчиком, который виден в карточке:
+    # по нему лента считает ETag (см. conditional).
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0),
+        updated_at=timezone.now(),
+    )
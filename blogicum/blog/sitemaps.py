@@ -0,0 +1,160 @@
+"""Карта сайта: индекс и разделы по SHARD_SIZE адресов.
+
+Раздел делится на части по диапазонам первичного ключа, поэтому
+номер части вычисляется без OFFSET, а список частей с датами
+изменения - одним запросом с GROUP BY. Строки части читаются через
+iterator() в виде кортежей, без создания объектов моделей; готовый
+XML части кешируется на SITEMAP_CACHE_TIMEOUT секунд.
+"""
+import itertools
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Max
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+
+from .hot_cache import hot_cache
+from .models import Category, Post
+from .references import categories
+
+SHARD_SIZE = 50000
+CHUNK_SIZE = 2000
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+# Значение, подходящее под любой конвертер пути (int, slug, str).
+PLACEHOLDER = '9081726354'
+
+User = get_user_model()
+
+
+class Section:
+    """Раздел карты сайта над одной моделью."""
+
+    url_name = None
+    lastmod = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_rows(self, queryset):
+        """(аргумент адреса, дата изменения) в порядке pk."""
+        raise NotImplementedError
+
+    def shards(self):
+        """Номера непустых частей и даты их изменения."""
+        return self.get_queryset().annotate(
+            shard=F('pk') / SHARD_SIZE
+        ).order_by().values('shard').annotate(
+            lastmod=Max(self.lastmod)
+        ).order_by('shard').values_list('shard', 'lastmod')
+
+    def rows(self, shard):
+        queryset = self.get_queryset().filter(
+            pk__gte=shard * SHARD_SIZE, pk__lt=(shard + 1) * SHARD_SIZE
+        )
+        return self.get_rows(queryset).iterator(chunk_size=CHUNK_SIZE)
+
+
+class PostSection(Section):
+    url_name = 'blog:post_detail'
+    lastmod = 'updated_at'
+
+    def get_queryset(self):
+        return Post.objects.get_all_posts().is_published()
+
+    def get_rows(self, queryset):
+        return queryset.order_by('pk').values_list('pk', 'updated_at')
+
+
+class CategorySection(Section):
+    url_name = 'blog:category_posts'
+    lastmod = 'posts__updated_at'
+
+    def get_queryset(self):
+        return Category.objects.filter(
+            is_published=True,
+            posts__is_published=True,
+            posts__pub_date__lte=timezone.now(),
+        )
+
+    def get_rows(self, queryset):
+        return queryset.values_list('slug').annotate(
+            lastmod=Max(self.lastmod)
+        ).order_by('pk')
+
+
+class ProfileSection(Section):
+    url_name = 'blog:profile'
+    lastmod = 'posts__updated_at'
+
+    def get_queryset(self):
+        return User.objects.filter(
+            posts__is_published=True,
+            posts__pub_date__lte=timezone.now(),
+            posts__category__in=categories.published_ids(),
+        )
+
+    def get_rows(self, queryset):
+        return queryset.values_list('username').annotate(
+            lastmod=Max(self.lastmod)
+        ).order_by('pk')
+
+
+SECTIONS = {
+    'posts': PostSection(),
+    'categories': CategorySection(),
+    'profiles': ProfileSection(),
+}
+
+
+def w3c_date(value):
+    return timezone.localtime(value).isoformat(timespec='seconds')
+
+
+def url_element(tag, loc, lastmod):
+    lastmod = f'<lastmod>{w3c_date(lastmod)}</lastmod>' if lastmod else ''
+    return f'<{tag}><loc>{escape(loc)}</loc>{lastmod}</{tag}>'
+
+
+def render_index(request):
+    yield f'{XML_DECLARATION}<sitemapindex xmlns="{XMLNS}">'
+    for name, section in SECTIONS.items():
+        for shard, lastmod in section.shards():
+            loc = request.build_absolute_uri(
+                reverse('blog:sitemap', args=(name, shard))
+            )
+            yield url_element('sitemap', loc, lastmod)
+    yield '</sitemapindex>'
+
+
+def render_shard(request, section, shard):
+    """XML части; пустой части (её нет в индексе) - Http404."""
+    rows = iter(section.rows(shard))
+    first = next(rows, None)
+    if first is None:
+        raise Http404('Такой части карты сайта нет.')
+    # reverse() один раз на часть, а не на каждый адрес.
+    prefix, suffix = request.build_absolute_uri(
+        reverse(section.url_name, args=(PLACEHOLDER,))
+    ).split(PLACEHOLDER)
+    yield f'{XML_DECLARATION}<urlset xmlns="{XMLNS}">'
+    for arg, lastmod in itertools.chain((first,), rows):
+        yield url_element('url', f'{prefix}{arg}{suffix}', lastmod)
+    yield '</urlset>'
+
+
+def cached_xml(request, name, render):
+    """XML из кеша или собранный из генератора render.
+
+    Пока один процесс пересобирает карту, остальные ещё столько же
+    отдают прежнюю.
+    """
+    return hot_cache.get_or_set(
+        f'blog:sitemap:{request.get_host()}:{name}',
+        lambda: ''.join(render),
+        settings.SITEMAP_CACHE_TIMEOUT,
+        stale=settings.SITEMAP_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,72 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.fragments import render_post_cards, render_post_text
+from blog.page_cache import author_only_marker, hole_marker
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов страницы: {% post_cards page_obj as cards %}."""
+    return render_post_cards(posts)
+
+
+@register.simple_tag
+def post_text(post):
+    """Текст поста с переносами строк: {% post_text post %}."""
+    return render_post_text(post)
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **params):
+    """Личная часть страницы: {% hole "includes/..." post_id=post.id %}.
+
+    Работает как include с параметрами. В общей версии страницы
+    (page_holes) вместо фрагмента выводится метка: её заполняет кеш
+    страниц, поэтому фрагмент получает только params (числа и
+    строки) и контекст запроса.
+    """
+    if context.get('page_holes'):
+        return mark_safe(hole_marker(template_name, params))
+    templates = context.render_context.dicts[0].setdefault(hole, {})
+    if template_name not in templates:
+        templates[template_name] = context.template.engine.get_template(
+            template_name
+        )
+    with context.push(**params):
+        return templates[template_name].render(context)
+
+
+class ForAuthorNode(template.Node):
+
+    def __init__(self, author_id, nodelist):
+        self.author_id = author_id
+        self.nodelist = nodelist
+
+    def render(self, context):
+        author_id = self.author_id.resolve(context)
+        if context.get('page_holes'):
+            return author_only_marker(author_id, self.nodelist.render(context))
+        if getattr(context.get('user'), 'pk', None) == author_id:
+            return self.nodelist.render(context)
+        return ''
+
+
+@register.tag
+def for_author(parser, token):
+    """Часть страницы только для автора.
+
+    {% for_author comment.author_id %}...{% endfor_author %}. В общей
+    версии страницы (page_holes) блок выводится в метке, и его
+    оставляет или вырезает кеш страниц.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает один аргумент - id автора.'
+        )
+    nodelist = parser.parse(('endfor_author',))
+    parser.delete_first_token()
+    return ForAuthorNode(parser.compile_filter(bits[1]), nodelist)
@@ -0,0 +1,24 @@
+from django import template
+
+from blog import images
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(post, kind='card'):
+    """Фото поста с WebP/JPEG srcset: {% post_picture post 'detail' %}."""
+    fallback = images.fallback(post, kind)
+    return {
+        'post': post,
+        'webp_srcset': images.srcset(post, 'webp'),
+        'jpeg_srcset': images.srcset(post, 'jpg'),
+        'src': (
+            post.image.storage.url(fallback['name'])
+            if fallback else post.image.url
+        ),
+        'width': fallback and fallback['width'],
+        'height': fallback and fallback['height'],
+        'sizes': f'(max-width: {images.WIDTHS["card"]}px) 100vw, '
+                 f'{images.WIDTHS["card"]}px',
+    }
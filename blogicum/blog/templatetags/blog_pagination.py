@@ -0,0 +1,14 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor=None):
+    """Ссылка на страницу ленты с тем же набором параметров запроса."""
+    query = context['request'].GET.copy()
+    query.pop('page', None)
+    query.pop('cursor', None)
+    if cursor:
+        query['cursor'] = cursor
+    return f'?{query.urlencode()}'
@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.urls import include, path
 
-from . import views
+from . import async_views, views
 
 app_name = 'blog'
 
+# Представления чтения: асинхронные под ASGI или обычные.
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
+
 posts_patterns = [
     path(
         'create/',
@@ -22,7 +26,7 @@ posts_patterns = [
     ),
     path(
         '',
-        views.PostDetailView.as_view(),
+        read_views.PostDetailView.as_view(),
         name='post_detail'
     ),
     path(
@@ -40,6 +44,11 @@ posts_patterns = [
         views.create_comment,
         name='add_comment'
     ),
+    path(
+        'comments/',
+        views.PostCommentsView.as_view(),
+        name='post_comments'
+    ),
 ]
 
 profile_patterns = [
@@ -50,19 +59,41 @@ profile_patterns = [
     ),
     path(
         '<str:username>/',
-        views.ProfilePostListView.as_view(),
+        read_views.ProfilePostListView.as_view(),
         name='profile'
     ),
 ]
 
 urlpatterns = [
-    path('', views.IndexListView.as_view(), name='index'),
+    path('', read_views.IndexListView.as_view(), name='index'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('posts/', include(posts_patterns)),
     path('posts/<int:post_id>/', include(posts_patterns)),
     path('profile/', include(profile_patterns)),
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemap-<str:section>-<int:shard>.xml',
+        views.sitemap,
+        name='sitemap'
+    ),
+    path(
+        'feeds/<str:format>/',
+        views.PostFeedView.as_view(),
+        name='feed'
+    ),
+    path(
+        'feeds/category/<slug:category_slug>/<str:format>/',
+        views.CategoryFeedView.as_view(),
+        name='category_feed'
+    ),
+    path(
+        'feeds/author/<str:username>/<str:format>/',
+        views.AuthorFeedView.as_view(),
+        name='author_feed'
+    ),
     path(
         'category/<slug:category_slug>/',
-        views.CategoryPostListView.as_view(),
+        read_views.CategoryPostListView.as_view(),
         name='category_posts'
     ),
 ]
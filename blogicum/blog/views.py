@@ -1,7 +1,7 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic.detail import SingleObjectMixin
 from django.contrib.auth.models import User
-from django.http import Http404
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone
@@ -13,24 +13,86 @@ from django.views.generic import (
     DetailView
 )
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Min
 
 from .forms import CommentForm, PostForm, ProfileForm
-from .models import Category, Post
+from .models import Post
 from .authorship import AuthorOrAdminMixin, AuthorMixin
 from .comment_handling import CommentMixin
+from .conditional import FeedConditionalGetMixin, PostConditionalGetMixin
+from .page_cache import PageCacheMixin
+from .pagination import CursorPaginationMixin
 from .post_handling import PostAccessMixin, PostContextData
+from .references import categories
+from .search import search
+from .sitemaps import SECTIONS, cached_xml, render_index, render_shard
+from .syndication import FEED_CLASSES, FEED_SIZE, render_items
 
 
 PAGINATION = 10
 
 
-class IndexListView(ListView):
+def next_publication(**filters):
+    """Дата ближайшей отложенной публикации среди постов filters."""
+    return Post.objects.filter(
+        is_published=True, pub_date__gt=timezone.now(), **filters
+    ).aggregate(next=Min('pub_date'))['next']
+
+
+class IndexListView(
+    PageCacheMixin,
+    FeedConditionalGetMixin,
+    CursorPaginationMixin,
+    ListView
+):
     model = Post
     form_class = PostForm
     template_name = 'blog/index.html'
-    queryset = Post.objects.get_all_posts().is_published()
     paginate_by = PAGINATION
 
+    def get_queryset(self):
+        queryset = Post.objects.get_all_posts().is_published().for_feed()
+        if self.by_activity():
+            return queryset.by_activity()
+        return queryset
+
+    def by_activity(self):
+        """?sort=activity - сначала самые обсуждаемые посты."""
+        return self.request.GET.get('sort') == 'activity'
+
+    def get_cursor_ordering(self):
+        if self.by_activity():
+            return ('-comments_count', '-pub_date', '-pk')
+        return super().get_cursor_ordering()
+
+    def get_page_dependencies(self):
+        return (('feed', 'all'), ('feed', 'refs'))
+
+    def get_next_publication(self):
+        return next_publication()
+
+
+class SearchView(CursorPaginationMixin, ListView):
+    """Поиск по опубликованным постам: /search/?q=..."""
+
+    template_name = 'blog/search.html'
+    paginate_by = PAGINATION
+
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        return search(
+            Post.objects.get_all_posts().is_published().for_feed(),
+            self.get_search_query(),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.get_search_query()
+        return context
+
 
 class PostCreateView(LoginRequiredMixin, AuthorMixin, CreateView):
     model = Post
@@ -92,6 +154,8 @@ class PostDeleteView(
 
 
 class PostDetailView(
+    PageCacheMixin,
+    PostConditionalGetMixin,
     PostAccessMixin,
     PostContextData,
     DetailView
@@ -101,12 +165,26 @@ class PostDetailView(
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
 
+    def get_page_dependencies(self):
+        return (('post', self.kwargs['post_id']), ('feed', 'refs'))
+
+    def is_page_public(self):
+        return self.post.is_published_at()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
         return context
 
 
+class PostCommentsView(PostAccessMixin, PostContextData, DetailView):
+    """HTML-фрагмент со следующей порцией комментариев к посту."""
+
+    model = Post
+    template_name = 'includes/comment_list.html'
+    pk_url_kwarg = 'post_id'
+
+
 class ProfileUpdateView(LoginRequiredMixin, UpdateView):
     model = User
     form_class = ProfileForm
@@ -123,16 +201,21 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         )
 
 
-class ProfilePostListView(ListView):
+class ProfilePostListView(
+    FeedConditionalGetMixin,
+    CursorPaginationMixin,
+    ListView
+):
     model = Post
     template_name = 'blog/profile.html'
     paginate_by = PAGINATION
 
     def get_queryset(self):
         self.user = self.get_user()
+        queryset = Post.objects.get_all_posts(author=self.user).for_feed()
         if self.request.user == self.user:
-            return Post.objects.get_all_posts(author=self.user)
-        return Post.objects.get_all_posts(author=self.user).is_published()
+            return queryset
+        return queryset.is_published()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -147,40 +230,136 @@ class ProfilePostListView(ListView):
         return get_object_or_404(User, username=username)
 
 
-class CategoryPostListView(SingleObjectMixin, ListView):
+class CategoryPostListView(
+    PageCacheMixin,
+    FeedConditionalGetMixin,
+    CursorPaginationMixin,
+    SingleObjectMixin,
+    ListView
+):
     model = Post
     paginate_by = PAGINATION
     template_name = 'blog/category.html'
     slug_url_kwarg = 'category_slug'
-    slug_field = 'slug'
 
     def get_object(self, queryset=None):
-        category = super().get_object(queryset=queryset)
+        category = categories.get_by_slug(self.kwargs[self.slug_url_kwarg])
+        if category is None:
+            raise Http404('Категория не найдена.')
         if not category.is_published:
             raise Http404('Категория неопубликована.')
         return category
 
     def get_queryset(self):
-        self.object = self.get_object(queryset=Category.objects.all())
-        return Post.objects.get_all_posts(category=self.object).is_published()
+        self.object = self.get_object()
+        return Post.objects.get_all_posts(
+            category=self.object
+        ).is_published().for_feed()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.object
         return context
 
+    def get_page_dependencies(self):
+        return (
+            ('category-feed', self.kwargs['category_slug']),
+            ('feed', 'refs'),
+        )
+
+    def get_next_publication(self):
+        return next_publication(category=self.get_object())
+
+
+class PostFeedView(FeedConditionalGetMixin, CursorPaginationMixin, ListView):
+    """Лента постов в формате RSS или Atom (kwargs['format'])."""
+
+    paginate_by = FEED_SIZE
+    feed_title = 'Блогикум'
+    feed_description = 'Новые публикации'
+
+    def dispatch(self, request, *args, **kwargs):
+        if kwargs['format'] not in FEED_CLASSES:
+            raise Http404('Неизвестный формат ленты.')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Post.objects.get_all_posts().is_published().for_feed()
+
+    def get_feed_link(self):
+        return reverse('blog:index')
+
+    def render_to_response(self, context, **response_kwargs):
+        posts = context['page_obj']
+        feed = FEED_CLASSES[self.kwargs['format']](
+            title=self.feed_title,
+            link=self.request.build_absolute_uri(self.get_feed_link()),
+            description=self.feed_description,
+            feed_url=self.request.build_absolute_uri(),
+            language='ru',
+            updated=max(
+                (post.updated_at for post in posts), default=None
+            ),
+        )
+        return StreamingHttpResponse(
+            feed.stream(render_items(feed, posts, self.request)),
+            content_type=feed.content_type,
+        )
+
+
+class CategoryFeedView(PostFeedView):
+
+    def get_queryset(self):
+        self.category = categories.get_by_slug(self.kwargs['category_slug'])
+        if self.category is None or not self.category.is_published:
+            raise Http404('Категория не найдена.')
+        self.feed_title = f'Блогикум: {self.category.title}'
+        return super().get_queryset().filter(category=self.category)
+
+    def get_feed_link(self):
+        return reverse('blog:category_posts', args=(self.category.slug,))
+
+
+class AuthorFeedView(PostFeedView):
+
+    def get_queryset(self):
+        self.author = get_object_or_404(
+            User, username=self.kwargs['username']
+        )
+        self.feed_title = f'Блогикум: {self.author.username}'
+        return super().get_queryset().filter(author=self.author)
+
+    def get_feed_link(self):
+        return reverse('blog:profile', args=(self.author.username,))
+
+
+def sitemap_index(request):
+    return HttpResponse(
+        cached_xml(request, 'index', render_index(request)),
+        content_type='application/xml',
+    )
+
+
+def sitemap(request, section, shard):
+    if section not in SECTIONS:
+        raise Http404('Неизвестный раздел карты сайта.')
+    return HttpResponse(
+        cached_xml(
+            request,
+            f'{section}:{shard}',
+            render_shard(request, SECTIONS[section], shard),
+        ),
+        content_type='application/xml',
+    )
+
 
 @login_required
 def create_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-
-    published_post = (
-        post.is_published
-        and post.pub_date <= timezone.now()
-        and post.category.is_published
+    post = get_object_or_404(
+        Post.objects.get_all_posts().with_references(), pk=post_id
     )
 
-    if post.author != request.user and not published_post:
+    if not post.is_visible_to(request.user):
         raise Http404('Вы не можете комментировать этот пост.')
 
     if request.method == 'POST':
@@ -189,7 +368,8 @@ def create_comment(request, post_id):
             comment = form.save(commit=False)
             comment.post = post
             comment.author = request.user
-            comment.save()
+            with transaction.atomic():
+                comment.save()
             return redirect('blog:post_detail', post_id=post.pk)
     else:
         form = CommentForm()
@@ -10,30 +10,56 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default):
+    return [item for item in os.getenv(name, default).split(',') if item]
+
+
+# Профиль настроек: development (по умолчанию) или production.
+# Отдельные значения переопределяются переменными окружения DJANGO_*.
+PROFILE = os.getenv('BLOGICUM_PROFILE', 'development')
+
+PRODUCTION = PROFILE == 'production'
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-ib4yl8%9hj5=@9w*6o)9p_^-a*@*m452xk8j&^d-2li8qtba3n"
+SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
+
+if not SECRET_KEY:
+    if PRODUCTION:
+        # Ключ из репозитория известен всем: им можно подписать сессию.
+        raise ImproperlyConfigured(
+            'Для профиля production задайте DJANGO_SECRET_KEY.'
+        )
+    SECRET_KEY = (
+        "django-insecure-ib4yl8%9hj5=@9w*6o)9p_^-a*@*m452xk8j&^d-2li8qtba3n"
+    )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DJANGO_DEBUG', not PRODUCTION)
 
-ALLOWED_HOSTS = [
-    'localhost',
-    '127.0.0.1',
-]
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1')
 
 
 # Application definition
 
 INSTALLED_APPS = [
+    "core.apps.CoreConfig",
     "pages.apps.PagesConfig",
     "blog.apps.BlogConfig",
     "django.contrib.admin",
@@ -46,6 +72,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.PerfMiddleware",
+    "core.middleware.InvalidationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -79,6 +107,19 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    # Шаблоны разбираются один раз на процесс.
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+
 WSGI_APPLICATION = "blogicum.wsgi.application"
 
 
@@ -88,10 +129,25 @@ WSGI_APPLICATION = "blogicum.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.getenv("DJANGO_DB_NAME", BASE_DIR / "db.sqlite3"),
+        # Соединение живёт между запросами, а не открывается на каждый.
+        "CONN_MAX_AGE": int(
+            os.getenv("DJANGO_CONN_MAX_AGE", 600 if PRODUCTION else 0)
+        ),
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite (см. core.signals).
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+} if PRODUCTION else {
+    "busy_timeout": 5000,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -129,6 +185,14 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+STATIC_ROOT = os.getenv("DJANGO_STATIC_ROOT", BASE_DIR / "static_root")
+
+if PRODUCTION:
+    # Имена с хешем содержимого: файлы можно кешировать навсегда.
+    STATICFILES_STORAGE = (
+        "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+    )
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -145,3 +209,75 @@ LOGIN_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# В production несколько процессов: кеш в файлах общий для них, и
+# версии объектов (blog.cache_versions) у всех одни. LocMem у каждого
+# процесса свой и годится, только если процесс один.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+} if PRODUCTION else {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Ближний уровень кеша горячих ключей (blog.hot_cache) в памяти
+# каждого процесса и блокировка их пересчёта
+HOT_CACHE_MAX_ENTRIES = 1000
+HOT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+HOT_CACHE_LOCAL_TIMEOUT = 60
+HOT_CACHE_LOCK_TIMEOUT = 5
+# Смелость раннего пересчёта XFetch: 0 - только по истечении срока
+HOT_CACHE_BETA = 1.0
+
+# Справочники категорий и мест в памяти процесса (blog.references)
+# перечитываются по событиям шины, но не реже раза в столько секунд
+REFERENCE_CACHE_TIMEOUT = 60 * 10
+
+# Кеш страниц и для вошедших пользователей: общая версия страницы,
+# в которую для каждого запроса подставляются личные фрагменты
+PAGE_CACHE_FOR_USERS = env_bool('BLOGICUM_PAGE_CACHE_FOR_USERS', True)
+
+# Ленты и страница поста обслуживаются blog.async_views (для ASGI)
+ASYNC_READ_VIEWS = env_bool('BLOGICUM_ASYNC_VIEWS', False)
+
+# Фоновая обработка фото (manage.py process_image_jobs)
+IMAGE_JOB_LEASE = 60 * 10
+
+IMAGE_JOB_MAX_ATTEMPTS = 5
+
+IMAGE_JOB_RETRY_DELAY = 30
+
+# Карта сайта пересобирается не чаще раза в SITEMAP_CACHE_TIMEOUT секунд
+SITEMAP_CACHE_TIMEOUT = 60 * 60
+
+# Замеры запросов по представлениям (core.perf, manage.py perf_report)
+PERF_WINDOW = 1000
+
+PERF_FLUSH_INTERVAL = 30
+
+PERF_DUPLICATE_THRESHOLD = 5
+
+PERF_STATS_DIR = os.getenv("PERF_STATS_DIR", BASE_DIR / "perf_stats")
+
+# Файлы замеров завершившихся процессов и не обновлявшиеся дольше
+# стольких секунд удаляются при построении отчёта
+PERF_STATS_MAX_AGE = 60 * 60 * 24
+
+# Шина инвалидации кешей процессов (core.invalidation): общий для
+# процессов файл журнала и наибольшая задержка применения событий
+INVALIDATION_LOG = os.getenv(
+    "BLOGICUM_INVALIDATION_LOG", BASE_DIR / "invalidation" / "events.log"
+)
+INVALIDATION_POLL_INTERVAL = 0.5
+INVALIDATION_LOG_MAX_BYTES = 1024 * 1024
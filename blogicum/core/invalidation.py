@@ -0,0 +1,238 @@
+"""Шина инвалидации кешей между процессами.
+
+Кеши в памяти процесса (справочники, ближний уровень кеша) не видят
+изменений, сделанных другими процессами. Событие инвалидации -
+(namespace, pk, version), например ('category', 3, 'a1b2c3'): объект
+изменился и получил новую версию.
+
+После фиксации транзакции событие применяется в процессе, который его
+опубликовал, и дописывается строкой JSON в общий файл
+INVALIDATION_LOG; при откате оно пропадает. Остальные процессы читают
+новые строки файла перед обработкой запроса (InvalidationMiddleware),
+не чаще раза в INVALIDATION_POLL_INTERVAL секунд - это и есть
+наибольшая задержка.
+
+Файл начинается строкой {"generation": n}. Дописывая событие, процесс,
+превысивший INVALIDATION_LOG_MAX_BYTES, заменяет файл новым поколением.
+Читатель дочитывает прежний файл через уже открытый дескриптор; если
+он пропустил целое поколение, подписчики сбрасывают всё.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: запись без блокировки
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+READ_BACK = 64 * 1024
+
+
+def log_path():
+    return Path(settings.INVALIDATION_LOG)
+
+
+def header(generation):
+    return json.dumps({'generation': generation}) + '\n'
+
+
+class WriteLock:
+    """flock на соседнем файле: сам журнал при ротации подменяется."""
+
+    def __init__(self, path):
+        self.path = path.with_name(path.name + '.lock')
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+
+
+def read_generation(path):
+    try:
+        with open(path, 'rb') as file:
+            return json.loads(file.readline())['generation']
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def append(events):
+    """Дописывает события в журнал, при необходимости начиная новый."""
+    if not events:
+        return
+    path = log_path()
+    lines = ''.join(
+        json.dumps(event, ensure_ascii=False) + '\n' for event in events
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with WriteLock(path):
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = None
+        if size is None or size >= settings.INVALIDATION_LOG_MAX_BYTES:
+            generation = read_generation(path) + 1 if size else 1
+            temporary = path.with_name(path.name + '.tmp')
+            temporary.write_text(header(generation))
+            temporary.replace(path)
+        # Писатели пишут под блокировкой, а читатель не берёт
+        # недописанную последнюю строку.
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+
+
+class Tail:
+    """Чтение новых строк журнала с запомненной позиции."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.started = False
+        self.generation = 0
+        self.position = 0
+
+    def open(self, from_end):
+        """Открывает текущий файл; False - его ещё нет."""
+        try:
+            file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        try:
+            self.generation = json.loads(file.readline())['generation']
+        except (ValueError, KeyError):
+            file.close()
+            raise
+        self.file = file
+        self.position = file.tell()
+        if from_end:
+            # Новому процессу прошлые события не нужны: его кеши пусты.
+            size = os.fstat(self.file.fileno()).st_size
+            start = max(self.position, size - READ_BACK)
+            self.file.seek(start)
+            tail = self.file.read(size - start)
+            self.position = start + tail.rfind(b'\n') + 1
+        return True
+
+    def read_lines(self):
+        """Полные строки после позиции; недописанная остаётся."""
+        self.file.seek(self.position)
+        data = self.file.read()
+        end = data.rfind(b'\n') + 1
+        self.position += end
+        return data[:end].splitlines()
+
+    def poll(self):
+        """(новые строки, пропущено ли поколение)."""
+        if self.file is None:
+            first, self.started = not self.started, True
+            if not self.open(from_end=first) or first:
+                return [], False
+            # Журнал появился после первого чтения.
+            return self.read_lines(), self.generation != 1
+        try:
+            inode = self.path.stat().st_ino
+        except FileNotFoundError:
+            return self.read_lines(), False
+        if inode == os.fstat(self.file.fileno()).st_ino:
+            return self.read_lines(), False
+        lines = self.read_lines()
+        self.file.close()
+        previous = self.generation
+        if not self.open(from_end=False):
+            self.file = None
+            return lines, True
+        return lines + self.read_lines(), self.generation != previous + 1
+
+
+class InvalidationBus:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handlers = []
+        self.tail = None
+        self.tail_path = None
+        self.polled_at = 0.0
+
+    def subscribe(self, handler):
+        """handler(namespace, pk, version) для каждого события.
+
+        Вызов с тремя None - события пропущены, сбросьте всё.
+        """
+        self.handlers.append(handler)
+        return handler
+
+    def dispatch(self, namespace, pk, version):
+        for handler in self.handlers:
+            try:
+                handler(namespace, pk, version)
+            except Exception:
+                logger.exception('Ошибка обработчика инвалидации')
+
+    def publish(self, events):
+        """События (namespace, pk, version) для всех процессов."""
+        events = [
+            {'namespace': namespace, 'pk': pk, 'version': version}
+            for namespace, pk, version in events
+        ]
+        transaction.on_commit(lambda: self.deliver(events))
+
+    def deliver(self, events):
+        """После фиксации: применение в своём процессе и запись в журнал.
+
+        Применённое до фиксации событие другой поток встретил бы, ещё
+        не видя изменений, и перечитал бы старые данные как новые.
+        """
+        for event in events:
+            self.dispatch(event['namespace'], event['pk'], event['version'])
+        try:
+            append(events)
+        except OSError:
+            logger.exception('Не удалось записать события инвалидации')
+
+    def poll(self, force=False):
+        """Применяет события других процессов из журнала.
+
+        События применяются под блокировкой, чтобы потоки процесса не
+        переставили их местами; обработчики должны быть быстрыми.
+        """
+        now = time.monotonic()
+        if not force and (
+            now - self.polled_at < settings.INVALIDATION_POLL_INTERVAL
+        ):
+            return
+        with self.lock:
+            self.polled_at = now
+            path = log_path()
+            if self.tail is None or self.tail_path != path:
+                self.tail, self.tail_path = Tail(path), path
+            try:
+                lines, missed = self.tail.poll()
+            except (OSError, ValueError, KeyError):
+                logger.exception('Не удалось прочитать журнал инвалидации')
+                return
+            if missed:
+                self.dispatch(None, None, None)
+            for line in lines:
+                try:
+                    event = json.loads(line)
+                    self.dispatch(
+                        event['namespace'], event['pk'], event['version']
+                    )
+                except (ValueError, KeyError):
+                    logger.warning('Повреждённая строка журнала: %r', line)
+
+
+bus = InvalidationBus()
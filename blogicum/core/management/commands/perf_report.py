@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.perf import build_report, clear_snapshots, load_snapshots
+
+COLUMNS = (
+    ('requests', 'запросов'),
+    ('queries_p50', 'SQL p50'),
+    ('queries_p95', 'SQL p95'),
+    ('db_ms_p95', 'БД мс p95'),
+    ('render_ms_p95', 'шаблон мс p95'),
+    ('total_ms_p50', 'всего мс p50'),
+    ('total_ms_p95', 'всего мс p95'),
+    ('total_ms_p99', 'всего мс p99'),
+    ('bytes_p50', 'байт p50'),
+)
+
+
+def cell(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.1f}'
+    return str(value)
+
+
+class Command(BaseCommand):
+    help = 'Показывает стоимость представлений по замерам PerfMiddleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON.'
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленные замеры после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        rows = build_report(load_snapshots())
+        if options['json']:
+            self.stdout.write(json.dumps(rows, ensure_ascii=False, indent=2))
+        else:
+            self.write_table(rows)
+        if options['reset']:
+            clear_snapshots()
+
+    def write_table(self, rows):
+        if not rows:
+            self.stdout.write('Замеров пока нет.')
+            return
+        width = max(len(row['view']) for row in rows)
+        self.stdout.write(' | '.join(
+            ['представление'.ljust(width)]
+            + [title for _, title in COLUMNS]
+        ))
+        for row in rows:
+            self.stdout.write(' | '.join(
+                [row['view'].ljust(width)]
+                + [cell(row[key]).rjust(len(title)) for key, title in COLUMNS]
+            ))
+        for row in rows:
+            for sql, requests in row['duplicates']:
+                self.stdout.write(self.style.WARNING(
+                    f'N+1? {row["view"]}: повторялся в {requests} '
+                    f'запросах: {sql}'
+                ))
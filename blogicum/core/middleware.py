@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .invalidation import bus
+from .perf import registry
+
+logger = logging.getLogger('core.perf')
+
+
+class QueryRecorder:
+    """execute_wrapper: считает запросы, их время и повторы SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        # Асинхронные представления выполняют запросы в нескольких
+        # потоках (см. recording_queries).
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.seconds += time.perf_counter() - start
+                self.count += 1
+                self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """SQL, выполненный в запросе не меньше threshold раз (N+1)."""
+        return [
+            sql for sql, count in self.statements.items()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def recording_queries(request):
+    """Учитывает запросы текущего потока в замере request.
+
+    Соединения с БД у каждого потока свои, поэтому код, выполняющий
+    запросы вне потока запроса, подключает к ним замер сам.
+    """
+    recorder = getattr(request, '_perf_recorder', None)
+    with ExitStack() as stack:
+        if recorder is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+class PerfMiddleware:
+    """Замеряет каждый запрос и записывает итог в core.perf.registry.
+
+    Слой намеренно синхронный и стоит первым: под ASGI вся цепочка
+    ниже него выполняется в одном потоке. Без него каждый слой Django
+    (MiddlewareMixin) переходит в поток и обратно дважды на запрос, и
+    асинхронные ленты становятся в разы медленнее синхронных
+    (benchmarks/bench_async_views.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = request._perf_recorder = QueryRecorder()
+        request._perf_render = None
+        start = time.perf_counter()
+        with recording_queries(request):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        duplicates = recorder.duplicates(settings.PERF_DUPLICATE_THRESHOLD)
+        for sql in duplicates:
+            logger.warning(
+                'Повторяющийся запрос (возможно, N+1) в %s: %s',
+                view_name, sql
+            )
+        registry.record(
+            view_name,
+            {
+                'queries': recorder.count,
+                'db_ms': recorder.seconds * 1000,
+                'render_ms': request._perf_render,
+                'total_ms': total * 1000,
+                'bytes': (
+                    None if response.streaming else len(response.content)
+                ),
+            },
+            duplicates,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._perf_render = (time.perf_counter() - started) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class InvalidationMiddleware:
+    """Перед запросом применяет события инвалидации других процессов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        bus.poll()
+        return self.get_response(request)
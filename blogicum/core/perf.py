@@ -0,0 +1,208 @@
+"""Статистика запросов по представлениям для PerfMiddleware.
+
+Для каждого представления (view_name из resolver_match) хранятся
+последние PERF_WINDOW замеров: число и время SQL-запросов, время
+рендеринга шаблона, общее время и размер ответа. Перцентили
+считаются только при построении отчёта, поэтому запись замера - это
+несколько append в deque.
+
+Каждый процесс раз в PERF_FLUSH_INTERVAL секунд сохраняет свои замеры
+в PERF_STATS_DIR/<pid>.json; отчёт (perf_report, /perf/) объединяет
+файлы всех процессов. Файлы завершившихся процессов и старше
+PERF_STATS_MAX_AGE при этом удаляются.
+
+Приложения добавляют в /perf/ счётчики своих кешей через
+register_stats, core о них не знает.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('queries', 'db_ms', 'render_ms', 'total_ms', 'bytes')
+PERCENTILES = (50, 95, 99)
+
+
+class ViewStats:
+
+    def __init__(self, window):
+        self.requests = 0
+        self.samples = {name: deque(maxlen=window) for name in METRICS}
+        # SQL, повторявшийся в одном запросе, -> число таких запросов.
+        self.duplicates = Counter()
+
+    def add(self, sample, duplicates):
+        self.requests += 1
+        for name in METRICS:
+            if sample.get(name) is not None:
+                self.samples[name].append(sample[name])
+        self.duplicates.update(duplicates)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'samples': {
+                name: list(values) for name, values in self.samples.items()
+            },
+            'duplicates': dict(self.duplicates),
+        }
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.flushed_at = time.monotonic()
+
+    def record(self, view_name, sample, duplicates=()):
+        with self.lock:
+            if view_name not in self.views:
+                self.views[view_name] = ViewStats(settings.PERF_WINDOW)
+            self.views[view_name].add(sample, duplicates)
+            if time.monotonic() - self.flushed_at < (
+                settings.PERF_FLUSH_INTERVAL
+            ):
+                return
+            self.flushed_at = time.monotonic()
+            snapshot = self.snapshot_unlocked()
+        save_snapshot(snapshot)
+
+    def snapshot(self):
+        with self.lock:
+            return self.snapshot_unlocked()
+
+    def snapshot_unlocked(self):
+        return {name: stats.as_dict() for name, stats in self.views.items()}
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+
+registry = Registry()
+
+stats_providers = {}
+
+
+def register_stats(name, provider):
+    """provider() - счётчики процесса для отчёта /perf/ под ключом name."""
+    stats_providers[name] = provider
+    return provider
+
+
+def collect_stats():
+    return {name: provider() for name, provider in stats_providers.items()}
+
+
+def snapshot_path(pid=None):
+    return Path(settings.PERF_STATS_DIR) / f'{pid or os.getpid()}.json'
+
+
+def save_snapshot(snapshot):
+    path = snapshot_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(snapshot))
+        temporary.replace(path)
+    except OSError:
+        logger.warning('Не удалось сохранить статистику в %s', path)
+
+
+def process_exists(pid):
+    if os.name == 'nt':
+        # os.kill на Windows завершает процесс, а не проверяет его.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_stale(path):
+    """Файл завершившегося процесса или давно не обновлявшийся."""
+    try:
+        pid = int(path.stem)
+    except ValueError:
+        return False
+    age = time.time() - path.stat().st_mtime
+    return age > settings.PERF_STATS_MAX_AGE or not process_exists(pid)
+
+
+def load_snapshots():
+    """Сохранённые замеры других процессов и живые замеры этого.
+
+    Устаревшие файлы удаляются, иначе после каждого перезапуска
+    процессов отчёт копил бы их замеры.
+    """
+    snapshots = []
+    directory = Path(settings.PERF_STATS_DIR)
+    if directory.is_dir():
+        for path in directory.glob('*.json'):
+            if path == snapshot_path():
+                continue
+            try:
+                if is_stale(path):
+                    path.unlink()
+                    continue
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+    snapshots.append(registry.snapshot())
+    return snapshots
+
+
+def clear_snapshots():
+    registry.reset()
+    directory = Path(settings.PERF_STATS_DIR)
+    if directory.is_dir():
+        for path in directory.glob('*.json'):
+            path.unlink()
+
+
+def percentile(ordered, p):
+    """Перцентиль p уже отсортированного списка."""
+    if not ordered:
+        return None
+    rank = math.ceil(p / 100 * len(ordered)) - 1
+    return ordered[min(len(ordered) - 1, max(rank, 0))]
+
+
+def build_report(snapshots):
+    """Строки отчёта по представлениям, самые дорогие по p95 - первыми."""
+    merged = defaultdict(lambda: {
+        'requests': 0,
+        'samples': defaultdict(list),
+        'duplicates': Counter(),
+    })
+    for snapshot in snapshots:
+        for view_name, stats in snapshot.items():
+            target = merged[view_name]
+            target['requests'] += stats['requests']
+            for name, values in stats['samples'].items():
+                target['samples'][name].extend(values)
+            target['duplicates'].update(stats['duplicates'])
+    rows = []
+    for view_name, stats in merged.items():
+        row = {'view': view_name, 'requests': stats['requests']}
+        for name in METRICS:
+            ordered = sorted(stats['samples'][name])
+            for p in PERCENTILES:
+                row[f'{name}_p{p}'] = percentile(ordered, p)
+        row['duplicates'] = stats['duplicates'].most_common(5)
+        rows.append(row)
+    return sorted(
+        rows, key=lambda row: row['total_ms_p95'] or 0, reverse=True
+    )
@@ -0,0 +1,17 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .perf import build_report, collect_stats, load_snapshots
+
+
+@staff_member_required
+def perf_report(request):
+    """Отчёт о стоимости представлений для сотрудников.
+
+    Кроме views - счётчики из register_stats процесса, ответившего на
+    запрос.
+    """
+    return JsonResponse(
+        {'views': build_report(load_snapshots()), **collect_stats()},
+        json_dumps_params={'ensure_ascii': False},
+    )
@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -26,6 +27,10 @@ from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
 
+from blog.hot_cache import hot_cache
+from blog.references import POST_REFERENCES
+from core.invalidation import bus
+
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
@@ -41,6 +46,46 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш страниц, карточек и справочников не должен переживать откат БД."""
+    cache.clear()
+    hot_cache.clear_local()
+    for _, registry in POST_REFERENCES:
+        registry.invalidate()
+    yield
+    cache.clear()
+    hot_cache.clear_local()
+    for _, registry in POST_REFERENCES:
+        registry.invalidate()
+
+
+def load_references():
+    """Справочники читает первый запрос процесса, а не каждый.
+
+    Сначала применяются уже записанные события шины, иначе их применил
+    бы измеряемый запрос.
+    """
+    bus.poll(force=True)
+    for _, registry in POST_REFERENCES:
+        registry.current()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def perf_stats_dir(tmp_path_factory):
+    """Замеры PerfMiddleware не должны попадать в каталог проекта."""
+    with override_settings(PERF_STATS_DIR=tmp_path_factory.mktemp("perf")):
+        yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def invalidation_log(tmp_path_factory):
+    """Журнал шины инвалидации тоже не пишется в каталог проекта."""
+    path = tmp_path_factory.mktemp("invalidation") / "events.log"
+    with override_settings(INVALIDATION_LOG=path):
+        yield path
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,129 @@
+import importlib
+import re
+import threading
+from contextlib import contextmanager
+
+import pytest
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import clear_url_caches, resolve
+
+import blog.urls
+import blogicum.urls
+from blog import async_views
+from core.perf import registry
+
+from conftest import load_references
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="[^"]*"')
+
+
+def reload_urls():
+    importlib.reload(blog.urls)
+    importlib.reload(blogicum.urls)
+    clear_url_caches()
+
+
+@contextmanager
+def read_views(use_async):
+    with override_settings(ASYNC_READ_VIEWS=use_async):
+        reload_urls()
+        yield
+    reload_urls()
+
+
+@pytest.fixture
+def urls(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post, author=user)
+    return {
+        'index': '/',
+        'category': f'/category/{post.category.slug}/',
+        'profile': f'/profile/{user.username}/',
+        'detail': f'/posts/{post.id}/',
+    }
+
+
+def page(client, url):
+    response = client.get(url)
+    return response.status_code, CSRF_TOKEN.sub('', response.content.decode())
+
+
+@pytest.fixture
+def query_threads():
+    """Потоки, в которых выполнялись запросы к БД."""
+    threads = set()
+
+    def remember(execute, sql, params, many, context):
+        threads.add(threading.get_ident())
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(remember)
+
+    connection_created.connect(install)
+    for connection in connections.all():
+        connection.execute_wrappers.append(remember)
+    yield threads
+    connection_created.disconnect(install)
+    for connection in connections.all():
+        if remember in connection.execute_wrappers:
+            connection.execute_wrappers.remove(remember)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_render_same_pages(client, user_client, urls):
+    pages = {}
+    for use_async in (False, True):
+        with read_views(use_async):
+            assert (
+                resolve('/').func.view_class.__module__ == 'blog.async_views'
+            ) is use_async
+            for name, url in urls.items():
+                for kind, http in (('anon', client), ('user', user_client)):
+                    pages[use_async, name, kind] = page(http, url)
+                    pages[use_async, name, kind, 'invalid'] = page(
+                        http, f'{url}?cursor=oops'
+                    )
+    for key, value in pages.items():
+        if key[0]:
+            assert value == pages[(False, *key[1:])], key
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(PAGE_CACHE_FOR_USERS=False)
+def test_queries_run_in_worker_threads(user_client, urls, query_threads):
+    recorded = {}
+    for use_async in (False, True):
+        with read_views(use_async):
+            registry.reset()
+            load_references()
+            query_threads.clear()
+            assert user_client.get(urls['detail']).status_code == 200
+        recorded[use_async] = registry.snapshot()['blog:post_detail']
+    # Пост, комментарии и их агрегаты - в разных потоках.
+    assert len(query_threads) >= 3
+    # PerfMiddleware учитывает и запросы из этих потоков, включая
+    # SQLITE_PRAGMAS нового соединения каждой из трёх задач.
+    assert recorded[True]['samples']['queries'] == [
+        recorded[False]['samples']['queries'][0]
+        + 3 * len(settings.SQLITE_PRAGMAS)
+    ]
+
+
+@pytest.mark.django_db
+def test_missing_objects_are_not_found(user_client, urls):
+    with read_views(True):
+        for url in ('/category/missing/', '/profile/missing/', '/posts/999/'):
+            assert user_client.get(url).status_code == 404, url
+
+
+def test_views_are_coroutines():
+    for name in (
+        'IndexListView', 'CategoryPostListView',
+        'ProfilePostListView', 'PostDetailView',
+    ):
+        view = getattr(async_views, name).as_view()
+        assert view.__code__.co_flags & 0x80, name
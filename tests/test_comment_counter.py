@@ -0,0 +1,126 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from blog import signals
+from blog.cache_versions import get_versions
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count(post):
+    return Post.objects.values_list('comments_count', flat=True).get(
+        pk=post.pk
+    )
+
+
+def test_counter_follows_comments(
+    mixer, user, post_with_published_location, post_with_another_category
+):
+    post = post_with_published_location
+    first, second = mixer.cycle(2).blend(
+        'blog.Comment', post=post, author=user
+    )
+    assert count(post) == 2
+
+    second.post = post_with_another_category
+    second.save()
+    assert count(post) == 1
+    assert count(post_with_another_category) == 1
+
+    first.delete()
+    Comment.objects.filter(pk=second.pk).delete()
+    assert count(post) == 0
+    assert count(post_with_another_category) == 0
+
+
+def test_comment_form_updates_counter(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f'/posts/{post.id}/comment/', data={'text': 'Привет'})
+    assert count(post) == 1
+
+
+def test_stale_post_save_keeps_counter(
+    mixer, user, post_with_published_location
+):
+    post = Post.objects.get(pk=post_with_published_location.pk)
+    mixer.blend('blog.Comment', post=post, author=user)
+    post.title = 'Новый заголовок'
+    post.save()
+    assert count(post) == 1
+
+
+def test_activity_feed(
+    mixer, user, user_client, post_with_published_location,
+    post_with_another_category
+):
+    mixer.blend('blog.Comment', post=post_with_another_category, author=user)
+    page = user_client.get('/?sort=activity').context['page_obj']
+    assert [p.pk for p in page] == [
+        post_with_another_category.pk, post_with_published_location.pk
+    ]
+
+
+def test_recount_fixes_drift(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post, author=user)
+    Post.objects.filter(pk=post.pk).update(comments_count=42)
+    call_command('recount_comments', '--batch-size=1')
+    assert count(post) == 3
+
+
+def test_recount_invalidates_cached_cards(
+    mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post, author=user)
+    Post.objects.filter(pk=post.pk).update(comments_count=42)
+    keys = (
+        ('post', post.pk), ('feed', 'all'),
+        ('category-feed', post.category.slug),
+    )
+    before = get_versions(*keys)
+    updated_at = Post.objects.get(pk=post.pk).updated_at
+
+    call_command('recount_comments', stdout=StringIO())
+    after = get_versions(*keys)
+    assert all(after[key] != before[key] for key in keys)
+    assert Post.objects.get(pk=post.pk).updated_at > updated_at
+
+
+def test_cascade_skips_per_comment_work(
+    mixer, user, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    other_post = mixer.blend(
+        'blog.Post', author=another_user, category=post.category
+    )
+    mixer.cycle(20).blend('blog.Comment', post=post, author=another_user)
+    mixer.blend('blog.Comment', post=other_post, author=user)
+    # Пост user уходит вместе с комментариями, а комментарий user к
+    # чужому посту уменьшает счётчик того поста.
+    with mock.patch.object(signals, 'bump', wraps=signals.bump) as bump:
+        user.delete()
+    bumped = [call.args[0] for call in bump.call_args_list]
+    assert bumped.count(('post', post.pk)) == 1
+    assert bumped.count(('post', other_post.pk)) == 1
+    assert count(other_post) == 0
+
+
+def test_rolled_back_delete_is_forgotten(
+    mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            signals.deleting_posts.add(post.pk)
+            raise RuntimeError
+    comment.delete()
+    assert count(post) == 0
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revisit(client, url, response):
+    with CaptureQueriesContext(connection) as queries:
+        again = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    return again, len(queries)
+
+
+@pytest.fixture
+def urls(user, post_with_published_location):
+    post = post_with_published_location
+    return {
+        'index': '/',
+        'category': f'/category/{post.category.slug}/',
+        'profile': f'/profile/{user.username}/',
+        'detail': f'/posts/{post.id}/',
+    }
+
+
+def test_revisit_is_not_modified(user_client, urls):
+    for url in urls.values():
+        response = user_client.get(url)
+        assert response['ETag'] and response['Last-Modified'], url
+        again, queries = revisit(user_client, url, response)
+        assert again.status_code == 304, url
+        assert not again.content
+        assert again.templates == []
+        # Сессия, пользователь, агрегирующий запрос (и сам объект).
+        assert queries <= 4, url
+
+
+def test_changes_invalidate_etag(
+    mixer, user, user_client, urls, post_with_published_location
+):
+    post = post_with_published_location
+    responses = {name: user_client.get(url) for name, url in urls.items()}
+
+    mixer.blend('blog.Comment', post=post, author=user)
+    for name, url in urls.items():
+        assert revisit(user_client, url, responses[name])[0].status_code == (
+            200
+        ), name
+
+    response = user_client.get(urls['detail'])
+    comment = post.comments.get()
+    comment.text = 'Исправленный комментарий'
+    comment.save()
+    assert revisit(user_client, urls['detail'], response)[0].status_code == (
+        200
+    )
+
+
+def test_etag_depends_on_user(
+    user_client, another_user_client, urls
+):
+    assert user_client.get(urls['index'])['ETag'] != (
+        another_user_client.get(urls['index'])['ETag']
+    )
+
+
+def test_cached_anonymous_page_is_not_modified(unlogged_client, urls):
+    response = unlogged_client.get(urls['index'])
+    again, queries = revisit(unlogged_client, urls['index'], response)
+    assert again.status_code == 304
+    assert queries == 0
@@ -0,0 +1,155 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from blog import dumps
+from blog.cache_versions import get_versions
+from blog.models import (
+    Category, Comment, ImageJob, ImageStatus, Location, Post, SearchEntry
+)
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / 'db.json'
+
+
+def import_dump(path, *args):
+    out = StringIO()
+    call_command('import_blog', str(path), *args, stdout=out)
+    return out.getvalue()
+
+
+def snapshot():
+    return {
+        model: sorted(model._base_manager.values_list(
+            *dumps.local_field_names(model)
+        ))
+        for model in dumps.dump_models()
+    }
+
+
+def wipe():
+    for model in reversed(dumps.dump_models()):
+        model._base_manager.all().delete()
+
+
+@pytest.mark.parametrize('format', ('jsonl', 'json'))
+def test_export_import_round_trip(
+    tmp_path, format, mixer, user, post_with_another_category
+):
+    post = post_with_another_category
+    mixer.blend('blog.Comment', post=post, author=user)
+    path = tmp_path / f'dump.{format}'
+    call_command(
+        'export_blog', output=str(path), format=format, batch_size=2,
+        stderr=StringIO(),
+    )
+    before = snapshot()
+    wipe()
+
+    import_dump(path, '--batch-size=2')
+    assert snapshot() == before
+    assert Post.objects.get(pk=post.pk).comments_count == 1
+    assert SearchEntry.objects.exists()
+
+
+def test_import_streams_db_json(monkeypatch):
+    # Маленькие куски: записи рвутся на границах чтения.
+    monkeypatch.setattr(dumps, 'CHUNK_SIZE', 100)
+    records = json.loads(DB_JSON.read_text(encoding='utf-8'))
+    output = import_dump(DB_JSON)
+
+    for model in (get_user_model(), Category, Location, Post):
+        expected = [
+            record for record in records
+            if record['model'] == model._meta.label_lower
+        ]
+        assert model.objects.count() == len(expected)
+    skipped = sum(
+        record['model'].split('.')[0] not in ('auth', 'blog')
+        or record['model'] == 'auth.permission'
+        for record in records
+    )
+    assert f'Пропущено записей других моделей: {skipped}' in output
+    first = next(record for record in records if record['model'] == 'blog.post')
+    assert Post.objects.get(pk=first['pk']).created_at.isoformat().startswith(
+        first['fields']['created_at'][:19]
+    )
+
+
+def test_import_loads_in_dependency_order(tmp_path, user, published_category):
+    records = [
+        {'model': 'blog.comment', 'pk': 7, 'fields': {
+            'text': 'Ответ', 'post': 5, 'author': user.pk,
+            'created_at': '2023-01-01T00:00:00Z', 'is_published': True,
+        }},
+        {'model': 'blog.post', 'pk': 5, 'fields': {
+            'title': 'Пост', 'text': 'Текст', 'author': user.pk,
+            'category': published_category.pk,
+            'pub_date': '2023-01-01T00:00:00Z',
+            'created_at': '2023-01-01T00:00:00Z', 'is_published': True,
+        }},
+    ]
+    path = tmp_path / 'dump.jsonl'
+    path.write_text('\n'.join(map(json.dumps, records)), encoding='utf-8')
+
+    import_dump(path)
+    assert Comment.objects.get(pk=7).post_id == 5
+    assert Post.objects.get(pk=5).comments_count == 1
+
+
+def test_import_is_atomic(tmp_path, post_with_published_location):
+    post = post_with_published_location
+    records = [
+        {'model': 'blog.location', 'pk': 100, 'fields': {'name': 'Место'}},
+        {'model': 'blog.post', 'pk': post.pk, 'fields': {
+            'title': 'Дубль', 'text': 'Текст', 'author': post.author_id,
+            'pub_date': '2023-01-01T00:00:00Z',
+        }},
+    ]
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(records), encoding='utf-8')
+
+    with pytest.raises(CommandError):
+        import_dump(path)
+    assert not Location.objects.filter(pk=100).exists()
+
+    import_dump(path, '--ignore-conflicts')
+    assert Location.objects.filter(pk=100).exists()
+    assert Post.objects.get(pk=post.pk).title == post.title
+
+
+def test_import_bumps_versions_and_enqueues_images(
+    tmp_path, user, published_category
+):
+    records = [
+        {'model': 'blog.post', 'pk': 5, 'fields': {
+            'title': 'Пост', 'text': 'Текст', 'author': user.pk,
+            'category': published_category.pk,
+            'pub_date': '2023-01-01T00:00:00Z',
+            'is_published': True, 'image': 'posts_images/photo.jpg',
+        }},
+        {'model': 'blog.post', 'pk': 6, 'fields': {
+            'title': 'Без фото', 'text': 'Текст', 'author': user.pk,
+            'pub_date': '2023-01-01T00:00:00Z',
+        }},
+    ]
+    path = tmp_path / 'dump.jsonl'
+    path.write_text('\n'.join(map(json.dumps, records)), encoding='utf-8')
+    keys = (
+        ('post', 5), ('feed', 'all'), ('feed', 'refs'),
+        ('category-feed', published_category.slug),
+    )
+    before = get_versions(*keys)
+
+    import_dump(path, '--skip-search-index')
+    after = get_versions(*keys)
+    assert all(after[key] != before[key] for key in keys)
+    assert list(ImageJob.objects.values_list('post_id', 'source')) == [
+        (5, 'posts_images/photo.jpg')
+    ]
+    assert Post.objects.get(pk=5).image_status == ImageStatus.PENDING
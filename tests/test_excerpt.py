@@ -0,0 +1,77 @@
+import importlib
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import EXCERPT_WORDS, Post
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = ' '.join(f'слово{i}' for i in range(EXCERPT_WORDS + 40))
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        text=LONG_TEXT,
+    )
+
+
+def stored_excerpt(post):
+    return Post.objects.values_list('excerpt', flat=True).get(pk=post.pk)
+
+
+def test_excerpt_follows_text(post):
+    assert stored_excerpt(post) == ' '.join(LONG_TEXT.split()[:60]) + '…'
+
+    post.text = 'Новый\nтекст'
+    post.save(update_fields=['text'])
+    assert stored_excerpt(post) == 'Новый текст'
+
+    post.title = 'Заголовок'
+    Post.objects.filter(pk=post.pk).update(excerpt='старый')
+    post.save(update_fields=['title'])
+    assert stored_excerpt(post) == 'старый'
+
+
+def test_feeds_do_not_load_text(client, post):
+    with CaptureQueriesContext(connection) as queries:
+        index = client.get('/')
+        feed = client.get('/feeds/rss/')
+        b''.join(feed.streaming_content)
+    assert not [
+        query['sql'] for query in queries
+        if '"blog_post"."text"' in query['sql']
+    ]
+    assert 'слово0 слово1' in index.content.decode()
+    assert 'слово9 …' in index.content.decode()
+
+
+def test_detail_text_follows_edits(client, post):
+    post.text = 'Первая\nвторая <b>'
+    post.save()
+    content = client.get(f'/posts/{post.pk}/').content.decode()
+    assert 'Первая<br>вторая &lt;b&gt;' in content
+
+    post.text = 'Исправлено'
+    post.save()
+    assert 'Исправлено' in client.get(f'/posts/{post.pk}/').content.decode()
+
+
+def test_migration_fills_excerpts_in_batches(monkeypatch, post, mixer):
+    others = mixer.cycle(3).blend(
+        'blog.Post', author=post.author, category=post.category
+    )
+    Post.objects.update(excerpt='')
+    migration = importlib.import_module('blog.migrations.0014_post_excerpt')
+    monkeypatch.setattr(migration, 'BATCH_SIZE', 2)
+
+    migration.fill_excerpts(apps, None)
+    for item in (post, *others):
+        item.refresh_from_db()
+        assert item.excerpt and item.excerpt.split()[0] == (
+            item.text.split()[0]
+        )
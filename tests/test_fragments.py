@@ -0,0 +1,92 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog import fragments
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(params=['locmem', 'filebased'])
+def card_cache(request, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    with override_settings(CACHES={'default': backends[request.param]}):
+        cache.clear()
+        yield
+        cache.clear()
+
+
+@pytest.fixture
+def two_categories_posts(
+    mixer, user, another_user, published_category, another_category,
+    published_location
+):
+    return [
+        mixer.blend('blog.Post', author=author, category=category,
+                    location=published_location)
+        for author, category in (
+            (user, published_category), (another_user, another_category)
+        )
+    ]
+
+
+def render(posts):
+    """Карточки и список постов, для которых шаблон рендерился заново."""
+    posts = list(Post.objects.filter(
+        pk__in=[post.pk for post in posts]
+    ).for_feed().order_by('pk'))
+    with mock.patch.object(
+        fragments, 'render_to_string', wraps=fragments.render_to_string
+    ) as render_to_string:
+        cards = fragments.render_post_cards(posts)
+    rendered = [
+        call.args[1]['post'].pk for call in render_to_string.call_args_list
+    ]
+    return cards, rendered
+
+
+def test_warm_cards_are_not_rerendered(card_cache, two_categories_posts):
+    cold, rendered = render(two_categories_posts)
+    assert len(rendered) == 2
+    warm, rendered = render(two_categories_posts)
+    assert rendered == []
+    assert warm == cold
+
+
+@pytest.mark.parametrize('change', ['post', 'category', 'comment', 'author'])
+def test_change_rerenders_only_affected_card(
+    mixer, card_cache, two_categories_posts, change
+):
+    changed = two_categories_posts[0]
+    render(two_categories_posts)
+
+    if change == 'post':
+        changed.title = 'Новый заголовок'
+        changed.save()
+        expected = 'Новый заголовок'
+    elif change == 'category':
+        changed.category.title = 'Новая категория'
+        changed.category.save()
+        expected = 'Новая категория'
+    elif change == 'comment':
+        mixer.blend('blog.Comment', post=changed)
+        expected = 'Комментарии (1)'
+    else:
+        changed.author.username = 'renamed_author'
+        changed.author.save()
+        expected = '@renamed_author'
+
+    cards, rendered = render(two_categories_posts)
+    assert rendered == [changed.pk]
+    assert expected in cards[two_categories_posts.index(changed)]
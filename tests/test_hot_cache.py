@@ -0,0 +1,131 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.hot_cache import TieredCache, hot_cache
+
+
+@pytest.fixture
+def tiered():
+    tiered = TieredCache()
+    yield tiered
+    tiered.clear_local()
+
+
+def test_local_tier_answers_without_shared_cache(tiered):
+    tiered.set('key', {'value': 1}, 60)
+    cache.clear()
+    assert tiered.get('key') == {'value': 1}
+    stats = tiered.stats()
+    assert stats['local_hits'] == 1
+    assert stats['local_hit_ratio'] == 1
+
+
+def test_local_copy_is_not_shared_with_callers(tiered):
+    tiered.set('key', ['a'], 60)
+    tiered.get('key').append('b')
+    assert tiered.get('key') == ['a']
+
+
+@override_settings(HOT_CACHE_MAX_ENTRIES=2)
+def test_local_tier_is_bounded(tiered):
+    for key in ('a', 'b', 'c'):
+        tiered.set(key, key, 60)
+    stats = tiered.stats()
+    assert stats['local_entries'] == 2
+    assert stats['local_evictions'] == 1
+    assert list(tiered.local.entries) == ['b', 'c']
+    # Вытесненное значение берётся из кеша Django.
+    assert tiered.get('a') == 'a'
+    assert tiered.stats()['shared_hits'] == 1
+
+    with override_settings(HOT_CACHE_MAX_BYTES=100):
+        tiered.set('big', 'x' * 1000, 60)
+    assert 'big' not in tiered.local.entries
+    assert tiered.local.bytes <= 100
+
+
+def test_concurrent_misses_compute_once(tiered):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            tiered.get_or_set('key', compute, 60)
+        ))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert tiered.stats()['waits'] >= 1
+
+
+def test_stale_value_is_served_while_another_recomputes(tiered):
+    tiered.set('key', 'old', 0.05, stale=60)
+    time.sleep(0.1)
+    assert tiered.acquire('key')
+    compute = mock.Mock(return_value='new')
+    assert tiered.get_or_set('key', compute, 60) == 'old'
+    compute.assert_not_called()
+    tiered.release('key')
+    assert tiered.get_or_set('key', compute, 60) == 'new'
+    assert tiered.stats()['stale_served'] == 1
+
+
+def test_expensive_value_is_recomputed_early(tiered):
+    tiered.set('key', 'value', 60, delta=30)
+    with mock.patch.object(tiered.random, 'random', return_value=0.99):
+        assert tiered.lookup('key') == ('value', True)
+    with override_settings(HOT_CACHE_BETA=0):
+        assert tiered.lookup('key') == ('value', False)
+    assert tiered.stats()['early'] == 1
+
+
+def test_works_on_filebased_backend(tmp_path):
+    with override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'files': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }):
+        tiered = TieredCache('files')
+        assert tiered.get_or_set('key', lambda: 'value', 60) == 'value'
+        tiered.set_many({'a': 1, 'b': 2}, 60)
+        tiered.clear_local()
+        assert tiered.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 2}
+        assert tiered.get('key') == 'value'
+        assert tiered.acquire('key') and not tiered.acquire('key')
+        tiered.release('key')
+        assert caches['files'].get('blog:lock:key') is None
+
+
+@pytest.mark.django_db
+def test_page_is_served_while_another_process_refreshes_it(
+    client, post_with_published_location
+):
+    client.get('/')
+    hot_cache.clear_local()
+    with mock.patch.object(hot_cache, 'is_fresh', return_value=False), \
+            mock.patch.object(hot_cache, 'acquire', return_value=False):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/')
+    assert response.status_code == 200
+    assert len(queries) == 0
@@ -0,0 +1,158 @@
+import os
+import signal
+import threading
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blog import images, jobs
+from blog.images import WIDTHS
+from blog.models import ImageJob, ImageStatus
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=str(tmp_path)):
+        yield tmp_path
+
+
+def photo(name='photo.jpg', size=(2000, 1000)):
+    data = BytesIO()
+    Image.new('RGB', size, color=(200, 30, 30)).save(data, 'JPEG')
+    return ContentFile(data.getvalue(), name=name)
+
+
+def processed(post):
+    jobs.process()
+    post.refresh_from_db()
+    return post
+
+
+@pytest.fixture
+def post_with_photo(mixer, user, published_category):
+    return processed(mixer.blend(
+        'blog.Post', author=user, category=published_category, image=photo()
+    ))
+
+
+def rendition_names(post):
+    return [r['name'] for r in post.image_renditions['files']]
+
+
+def test_renditions_are_created_on_upload(post_with_photo):
+    meta = post_with_photo.image_renditions
+    assert meta['source'] == post_with_photo.image.name
+    assert {(r['width'], r['format']) for r in meta['files']} == {
+        (width, fmt) for width in WIDTHS.values() for fmt in ('jpg', 'webp')
+    }
+    for rendition in meta['files']:
+        assert default_storage.exists(rendition['name'])
+        with default_storage.open(rendition['name']) as file:
+            assert Image.open(file).size == (
+                rendition['width'], rendition['height']
+            )
+
+
+def test_small_images_are_not_upscaled(mixer, user, published_category):
+    post = processed(mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=photo(size=(300, 200))
+    ))
+    assert {r['width'] for r in post.image_renditions['files']} == {300}
+
+
+def test_feed_and_detail_use_srcset(user_client, post_with_photo):
+    for url in ('/', f'/posts/{post_with_photo.id}/'):
+        content = user_client.get(url).content.decode()
+        assert 'type="image/webp"' in content
+        assert f'{WIDTHS["card"]}w' in content
+        assert content.count('img-thumbnail') == 1
+
+
+def test_replaced_image_drops_old_renditions(post_with_photo):
+    old = rendition_names(post_with_photo)
+    post_with_photo.image = photo('other.jpg')
+    post_with_photo.save()
+    processed(post_with_photo)
+    assert not any(default_storage.exists(name) for name in old)
+    assert all(
+        default_storage.exists(name)
+        for name in rendition_names(post_with_photo)
+    )
+
+
+def test_deleted_post_drops_renditions(post_with_photo):
+    names = rendition_names(post_with_photo)
+    post_with_photo.delete()
+    assert not any(default_storage.exists(name) for name in names)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_only_enqueues_a_job(mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category, image=photo()
+    )
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.PENDING
+    assert post.image_renditions == {}
+    assert ImageJob.objects.get(post=post).source == post.image.name
+
+    call_command('process_image_jobs', '--once', '--workers=1')
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.READY
+    assert post.image_renditions['files']
+
+
+def test_job_is_idempotent(post_with_photo):
+    job = ImageJob.objects.get(post=post_with_photo)
+    with mock.patch.object(images, 'build_renditions') as build:
+        assert jobs.run(job)
+    build.assert_not_called()
+
+
+def test_failed_job_is_retried_then_given_up(
+    mixer, user, published_category, settings
+):
+    settings.IMAGE_JOB_MAX_ATTEMPTS = 2
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category, image=photo()
+    )
+    with mock.patch.object(
+        images, 'build_renditions', side_effect=OSError('disk full')
+    ):
+        assert jobs.process() == 1
+        job = ImageJob.objects.get(post=post)
+        assert job.status == ImageJob.Status.PENDING
+        assert job.run_after > timezone.now()
+        assert 'disk full' in job.last_error
+
+        ImageJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        assert jobs.process() == 1
+
+    job.refresh_from_db()
+    post.refresh_from_db()
+    assert job.status == ImageJob.Status.FAILED
+    assert post.image_status == ImageStatus.FAILED
+    assert jobs.process() == 0
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('signum', [signal.SIGINT, signal.SIGTERM])
+def test_worker_stops_on_signal(signum):
+    timer = threading.Timer(0.2, os.kill, (os.getpid(), signum))
+    timer.start()
+    out = StringIO()
+    call_command(
+        'process_image_jobs', '--workers=2', '--poll-interval=60', stdout=out
+    )
+    timer.join()
+    assert 'Обработано заданий: 0' in out.getvalue()
@@ -0,0 +1,249 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog.cache_versions import apply_event, get_versions
+from core import invalidation
+from core.invalidation import InvalidationBus
+
+PROJECT = Path(__file__).resolve().parent.parent / 'blogicum'
+
+# Читатель: печатает ready после первого чтения журнала, затем ждёт
+# argv[1] событий и печатает их с задержкой получения.
+READER = '''
+import json, sys, time
+import django
+django.setup()
+from core.invalidation import bus
+seen = []
+bus.subscribe(lambda *event: seen.append([*event, time.time()]))
+bus.poll(force=True)
+print('ready', flush=True)
+deadline = time.monotonic() + 20
+while len(seen) < int(sys.argv[1]) and time.monotonic() < deadline:
+    time.sleep(0.01)
+    bus.poll()
+print(json.dumps(seen), flush=True)
+'''
+
+# Писатель: argv[2] пачек по 3 события с меткой процесса argv[1].
+WRITER = '''
+import sys
+import django
+django.setup()
+from core.invalidation import append
+for i in range(int(sys.argv[2])):
+    append([
+        {'namespace': sys.argv[1], 'pk': i, 'version': str(part)}
+        for part in range(3)
+    ])
+'''
+
+# Страница: кеширует главную со старым заголовком, печатает ready и
+# после строки на входе печатает главную заново.
+PAGE = '''
+import sys
+import django
+django.setup()
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+from blog.models import Category, Post
+from core.invalidation import bus
+setup_test_environment()
+call_command('migrate', verbosity=0)
+Post.objects.create(
+    title='Старый заголовок', text='Текст', pub_date=timezone.now(),
+    author=get_user_model().objects.create(username='author'),
+    category=Category.objects.create(title='Тема', slug='topic'),
+)
+client = Client()
+assert 'Старый заголовок' in client.get('/').content.decode()
+print('ready', flush=True)
+sys.stdin.readline()
+bus.poll(force=True)
+print(client.get('/').content.decode(), flush=True)
+'''
+
+# Другой процесс: меняет заголовок через модель, как представление.
+RENAME = '''
+import django
+django.setup()
+from blog.models import Post
+post = Post.objects.get()
+post.title = 'Новый заголовок'
+post.save()
+'''
+
+
+def event(namespace, pk, version='v'):
+    return {'namespace': namespace, 'pk': pk, 'version': version}
+
+
+def spawn(script, log, *args, **env):
+    return subprocess.Popen(
+        [sys.executable, '-c', script, *map(str, args)],
+        cwd=PROJECT,
+        env={
+            **os.environ,
+            'PYTHONPATH': str(PROJECT),
+            'DJANGO_SETTINGS_MODULE': 'blogicum.settings',
+            'BLOGICUM_INVALIDATION_LOG': str(log),
+            **env,
+        },
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+
+
+def start_readers(log, count, expected):
+    readers = [spawn(READER, log, expected) for _ in range(count)]
+    for reader in readers:
+        assert reader.stdout.readline().strip() == 'ready'
+    return readers
+
+
+def results(readers):
+    return [
+        json.loads(reader.communicate(timeout=30)[0]) for reader in readers
+    ]
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / 'events.log'
+    with override_settings(INVALIDATION_LOG=path):
+        yield path
+
+
+def test_events_reach_every_process(log):
+    invalidation.append([event('old', 0)])
+    readers = start_readers(log, 3, expected=4)
+    published = time.time()
+    invalidation.append([event('category', pk, f'v{pk}') for pk in range(4)])
+    for seen in results(readers):
+        # События до запуска процесса ему не нужны.
+        assert [event[:3] for event in seen] == [
+            ['category', pk, f'v{pk}'] for pk in range(4)
+        ]
+        delay = max(event[3] for event in seen) - published
+        assert delay < 0.5 + 1
+
+
+def test_concurrent_writers_do_not_mix_lines(log):
+    invalidation.append([event('old', 0)])
+    readers = start_readers(log, 1, expected=4 * 50 * 3)
+    writers = [spawn(WRITER, log, f'w{n}', 50) for n in range(4)]
+    for writer in writers:
+        assert writer.wait(timeout=30) == 0
+    (seen,) = results(readers)
+    assert len(seen) == 4 * 50 * 3
+    for n in range(4):
+        mine = [event[1:3] for event in seen if event[0] == f'w{n}']
+        assert mine == [
+            [i, str(part)] for i in range(50) for part in range(3)
+        ]
+
+
+def test_reader_follows_log_rotation(log):
+    bus = InvalidationBus()
+    seen = []
+    bus.subscribe(lambda *args: seen.append(args))
+    invalidation.append([event('old', 0)])
+    bus.poll(force=True)
+    with override_settings(INVALIDATION_LOG_MAX_BYTES=200):
+        for pk in range(20):
+            invalidation.append([event('post', pk)])
+            if pk % 2:
+                bus.poll(force=True)
+    assert invalidation.read_generation(log) > 2
+    assert seen == [('post', pk, 'v') for pk in range(20)]
+
+
+def test_missed_generation_resets_subscribers(log):
+    bus = InvalidationBus()
+    seen = []
+    bus.subscribe(lambda *args: seen.append(args))
+    invalidation.append([event('post', 1, 'a')])
+    bus.poll(force=True)
+    with override_settings(INVALIDATION_LOG_MAX_BYTES=1):
+        # Каждая запись начинает новое поколение; читатель открыл
+        # первое и пропустил второе.
+        invalidation.append([event('post', 2, 'b')])
+        invalidation.append([event('post', 3, 'c')])
+    bus.poll(force=True)
+    assert seen == [(None, None, None), ('post', 3, 'c')]
+
+    invalidation.append([event('post', 4, 'd')])
+    bus.poll(force=True)
+    assert seen[-1] == ('post', 4, 'd')
+
+
+def test_partial_line_waits_for_the_rest(log):
+    bus = InvalidationBus()
+    seen = []
+    bus.subscribe(lambda *args: seen.append(args))
+    invalidation.append([event('old', 0)])
+    bus.poll(force=True)
+    line = json.dumps(event('post', 1, 'a'))
+    with open(log, 'a') as file:
+        file.write(line[:10])
+    bus.poll(force=True)
+    assert seen == []
+    with open(log, 'a') as file:
+        file.write(line[10:] + '\n')
+    bus.poll(force=True)
+    assert seen == [('post', 1, 'a')]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_model_change_is_published_after_commit(
+    log, mixer, published_category
+):
+    (reader,) = start_readers(log, 1, expected=2)
+    published_category.is_published = False
+    published_category.save()
+    (seen,) = results([reader])
+    assert {tuple(event[:2]) for event in seen} == {
+        ('category', published_category.pk), ('feed', 'refs'),
+    }
+
+
+def test_bump_invalidates_page_cached_by_another_process(log, tmp_path):
+    database = tmp_path / 'db.sqlite3'
+    page = spawn(PAGE, log, DJANGO_DB_NAME=str(database))
+    assert page.stdout.readline().strip() == 'ready'
+    rename = spawn(RENAME, log, DJANGO_DB_NAME=str(database))
+    assert rename.wait(timeout=30) == 0
+    content, _ = page.communicate('\n', timeout=30)
+    assert 'Новый заголовок' in content
+    assert 'Старый заголовок' not in content
+
+
+@pytest.mark.parametrize('backend, applied', [
+    ('locmem.LocMemCache', True),
+    ('filebased.FileBasedCache', False),
+])
+def test_events_touch_only_process_local_cache(tmp_path, backend, applied):
+    with override_settings(CACHES={'default': {
+        'BACKEND': f'django.core.cache.backends.{backend}',
+        'LOCATION': str(tmp_path),
+    }}):
+        current = get_versions(('post', 1))[('post', 1)]
+        cache.set('page', 'html')
+        # Общий кеш: событие устарело, а сброс задел бы все процессы.
+        apply_event('post', 1, 'old')
+        apply_event(None, None, None)
+        assert (get_versions(('post', 1))[('post', 1)] == current) != applied
+        assert (cache.get('page') == 'html') != applied
+        cache.clear()
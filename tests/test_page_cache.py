@@ -0,0 +1,175 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.cache_versions import bump
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return response.content.decode(), len(queries)
+
+
+@pytest.fixture
+def urls(post_with_published_location, post_with_another_category):
+    post = post_with_published_location
+    return {
+        'index': '/',
+        'category': f'/category/{post.category.slug}/',
+        'other_category': (
+            f'/category/{post_with_another_category.category.slug}/'
+        ),
+        'detail': f'/posts/{post.id}/',
+    }
+
+
+def test_anonymous_pages_are_served_from_cache(unlogged_client, urls):
+    for url in urls.values():
+        get(unlogged_client, url)
+        _, queries = get(unlogged_client, url)
+        assert queries == 0, url
+
+
+def test_logged_in_pages_reuse_shared_body(
+    user_client, another_user_client, urls
+):
+    for url in urls.values():
+        get(user_client, url)
+        # Остаются только сессия и пользователь.
+        _, queries = get(another_user_client, url)
+        assert queries <= 2, url
+
+
+def test_personal_fragments_are_filled_per_user(
+    user, another_user, user_client, another_user_client, urls,
+    post_with_published_location,
+):
+    post = post_with_published_location
+    comment = post.comments.create(text='Текст', author=another_user)
+    author_page, _ = get(user_client, urls['detail'])
+    reader_page, queries = get(another_user_client, urls['detail'])
+    assert queries <= 2
+    for content in (author_page, reader_page):
+        assert '<!--hole:' not in content
+        assert 'csrfmiddlewaretoken' in content
+    assert f'/posts/{post.id}/edit/' in author_page
+    assert f'/posts/{post.id}/edit/' not in reader_page
+    comment_edit = f'/posts/{post.id}/edit_comment/{comment.id}/'
+    assert comment_edit in reader_page
+    assert comment_edit not in author_page
+    assert f'>{user.username}</a>' in author_page
+    assert f'>{another_user.username}</a>' in reader_page
+    assert f'>{user.username}</a>' not in reader_page
+
+
+def test_shared_page_etag_is_personal(
+    user_client, another_user_client, urls
+):
+    url = urls['index']
+    user_client.get(url)
+    etag = user_client.get(url)['ETag']
+    assert another_user_client.get(url)['ETag'] != etag
+    revisit = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert revisit.status_code == 304
+
+
+def test_hidden_post_is_not_shared(
+    mixer, user, user_client, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    url = f'/posts/{post.id}/'
+    get(user_client, url)
+    content, queries = get(user_client, url)
+    assert queries > 2
+    assert '<!--hole:' not in content
+
+
+def test_post_edit_purges_only_affected_pages(
+    unlogged_client, urls, post_with_published_location
+):
+    for url in urls.values():
+        get(unlogged_client, url)
+
+    post_with_published_location.title = 'Исправленный заголовок'
+    post_with_published_location.save()
+
+    for name, url in urls.items():
+        content, queries = get(unlogged_client, url)
+        if name == 'other_category':
+            assert queries == 0
+        else:
+            assert 'Исправленный заголовок' in content, name
+
+
+def test_new_comment_purges_post_page(
+    user_client, unlogged_client, urls, post_with_published_location
+):
+    get(unlogged_client, urls['detail'])
+    user_client.post(
+        f'{urls["detail"]}comment/', data={'text': 'Свежий комментарий'}
+    )
+    content, _ = get(unlogged_client, urls['detail'])
+    assert 'Свежий комментарий' in content
+
+
+def test_timeout_stops_at_next_scheduled_post(
+    mixer, unlogged_client, urls, post_with_published_location
+):
+    mixer.blend(
+        'blog.Post',
+        category=post_with_published_location.category,
+        pub_date=timezone.now() + timedelta(seconds=90),
+    )
+    with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+        get(unlogged_client, urls['index'])
+        get(unlogged_client, urls['other_category'])
+    index_timeout, other_timeout = [
+        call.args[2] for call in cache_set.call_args_list
+        if call.args[0].startswith('blog:page:')
+    ]
+    assert 0 < index_timeout <= 90
+    assert other_timeout > 90
+
+
+@pytest.mark.django_db(transaction=True)
+def test_page_read_before_commit_is_not_kept(
+    user, unlogged_client, urls, post_with_published_location
+):
+    post = post_with_published_location
+    get(unlogged_client, urls['detail'])
+    read = []
+
+    def read_concurrently():
+        try:
+            read.append(get(Client(), urls['detail']))
+        finally:
+            connections.close_all()
+
+    with transaction.atomic():
+        # Версия сменилась, как в сигнале, а строки другим ещё не видны:
+        # параллельный запрос кеширует старую страницу под новой версией.
+        bump(('post', post.pk))
+        reader = threading.Thread(target=read_concurrently)
+        reader.start()
+        reader.join()
+        Comment.objects.bulk_create([
+            Comment(post=post, author=user, text='Свежий комментарий')
+        ])
+    assert read and 'Свежий комментарий' not in read[0][0]
+    content, _ = get(unlogged_client, urls['detail'])
+    assert 'Свежий комментарий' in content
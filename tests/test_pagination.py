@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+from blog.pagination import CursorPaginator
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def tied_posts(mixer, user, published_category):
+    """Посты с одинаковыми датами: порядок держится на pk."""
+    now = timezone.now()
+    return mixer.cycle(N_PER_PAGE * 3 + 2).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        pub_date=mixer.sequence(
+            *(now - timezone.timedelta(hours=i // 3) for i in range(40))
+        ),
+    )
+
+
+def walk(client, url, cursor_attr):
+    page = client.get(url).context['page_obj']
+    pages = [page]
+    while getattr(page, cursor_attr) is not None:
+        page = client.get(
+            f'{url}?cursor={getattr(page, cursor_attr)}'
+        ).context['page_obj']
+        pages.append(page)
+    return pages
+
+
+def test_cursor_pages_cover_feed_once(user_client, tied_posts):
+    expected = list(
+        Post.objects.order_by('-pub_date', '-pk').values_list('pk', flat=True)
+    )
+    pages = walk(user_client, '/', 'next_cursor')
+    assert [post.pk for page in pages for post in page] == expected
+    assert all(len(page) == N_PER_PAGE for page in pages[:-1])
+
+    last = pages[-1]
+    back = user_client.get(
+        f'/?cursor={last.previous_cursor}'
+    ).context['page_obj']
+    assert [post.pk for post in back] == [post.pk for post in pages[-2]]
+
+
+@override_settings(PAGE_CACHE_FOR_USERS=False)
+def test_deep_page_costs_same_as_first(user_client, tied_posts):
+    with CaptureQueriesContext(connection) as first:
+        first_page = user_client.get('/').context['page_obj']
+    cursor = walk(user_client, '/', 'next_cursor')[-2].next_cursor
+    with CaptureQueriesContext(connection) as deep:
+        user_client.get(f'/?cursor={cursor}')
+
+    assert first_page.has_next()
+    assert len(first) == len(deep)
+    assert not any(
+        q['sql'].startswith('SELECT COUNT(') for q in deep.captured_queries
+    )
+
+
+def test_page_number_links_still_work(user_client, tied_posts):
+    response = user_client.get('/?page=2')
+    assert response.status_code == 200
+    assert response.context['page_obj'].number == 2
+    assert len(response.context['page_obj']) == N_PER_PAGE
+
+
+def test_broken_cursor_is_404(user_client, tied_posts):
+    assert user_client.get('/?cursor=garbage').status_code == 404
+
+
+def test_empty_cursor_is_first_page(tied_posts):
+    paginator = CursorPaginator(Post.objects.all(), N_PER_PAGE)
+    page = paginator.page('')
+    assert not page.has_previous()
+    assert [post.pk for post in page] == [
+        post.pk for post in paginator.page(None)
+    ]
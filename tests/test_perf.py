@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core import perf
+from core.middleware import PerfMiddleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    perf.clear_snapshots()
+    yield
+    perf.clear_snapshots()
+
+
+def report():
+    return {row['view']: row for row in perf.build_report(
+        perf.load_snapshots()
+    )}
+
+
+def test_requests_are_measured_per_view(
+    user_client, post_with_published_location
+):
+    for _ in range(3):
+        user_client.get('/')
+    user_client.get(f'/posts/{post_with_published_location.id}/')
+
+    rows = report()
+    index = rows['blog:index']
+    assert index['requests'] == 3
+    assert index['queries_p50'] > 0
+    assert index['db_ms_p95'] >= 0
+    assert index['render_ms_p95'] > 0
+    assert index['bytes_p50'] > 0
+    assert index['duplicates'] == []
+    assert rows['blog:post_detail']['requests'] == 1
+
+
+def test_repeated_queries_are_flagged(caplog, settings):
+    settings.PERF_DUPLICATE_THRESHOLD = 3
+
+    def view(request):
+        for _ in range(4):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        return HttpResponse('ok')
+
+    request = RequestFactory().get('/')
+    request.resolver_match = None
+    with caplog.at_level(logging.WARNING, logger='core.perf'):
+        PerfMiddleware(view)(request)
+
+    row = report()['unresolved']
+    assert row['queries_p50'] == 4
+    assert row['duplicates'] == [('SELECT 1', 1)]
+    assert 'N+1' in caplog.text
+
+
+def test_snapshots_of_other_processes_are_merged(settings, user_client):
+    settings.PERF_FLUSH_INTERVAL = 0
+    user_client.get('/')
+    saved = perf.snapshot_path()
+    saved.rename(perf.snapshot_path(pid=1))
+    perf.registry.reset()
+    user_client.get('/')
+    assert report()['blog:index']['requests'] == 2
+
+
+def test_stale_snapshots_are_dropped(settings):
+    finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+    finished.wait()
+    perf.registry.record('blog:index', dict.fromkeys(perf.METRICS, 1))
+    snapshot = json.dumps(perf.registry.snapshot())
+    perf.registry.reset()
+    dead = perf.snapshot_path(pid=finished.pid)
+    old = perf.snapshot_path(pid=1)
+    for path in (dead, old):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(snapshot)
+    os.utime(old, (0, 0))
+    settings.PERF_STATS_MAX_AGE = 60
+    assert 'blog:index' not in report()
+    assert not dead.exists()
+    assert not old.exists()
+
+
+def test_report_command_and_endpoint(user_client, admin_client):
+    user_client.get('/')
+    out = StringIO()
+    call_command('perf_report', stdout=out)
+    assert 'blog:index' in out.getvalue()
+
+    assert user_client.get('/perf/').status_code == 302
+    report_json = admin_client.get('/perf/').json()
+    assert 'blog:index' in [row['view'] for row in report_json['views']]
+    # Счётчики hot_cache регистрирует приложение blog.
+    assert report_json['hot_cache']['max_entries'] > 0
+
+    call_command('perf_report', '--reset', stdout=StringIO())
+    assert report() == {}
@@ -0,0 +1,131 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+from blog.post_handling import COMMENTS_PAGINATION
+
+from conftest import N_PER_PAGE, load_references
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return len(queries)
+
+
+def add_posts(mixer, n, author, category, locations):
+    posts = mixer.cycle(n).blend(
+        'blog.Post',
+        author=author,
+        category=category,
+        location=mixer.sequence(*locations),
+    )
+    for post in posts:
+        mixer.cycle(2).blend('blog.Comment', post=post)
+    return posts
+
+
+@pytest.mark.parametrize('client_name', ['user_client', 'unlogged_client'])
+@pytest.mark.parametrize('url_name', ['index', 'category', 'profile'])
+def test_feed_query_count_does_not_depend_on_page_size(
+    request, mixer, user, published_category, published_locations,
+    client_name, url_name
+):
+    client = request.getfixturevalue(client_name)
+    url = {
+        'index': '/',
+        'category': f'/category/{published_category.slug}/',
+        'profile': f'/profile/{user.username}/',
+    }[url_name]
+
+    add_posts(mixer, 1, user, published_category, published_locations)
+    load_references()
+    queries_for_one = count_queries(client, url)
+    add_posts(
+        mixer, N_PER_PAGE, user, published_category, published_locations
+    )
+    queries_for_page = count_queries(client, url)
+
+    assert queries_for_one == queries_for_page
+
+
+def lookups_of(queries, table):
+    """SELECT'ы, выбирающие одну строку table по первичному ключу."""
+    return [
+        q['sql'] for q in queries
+        if q['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in q['sql']
+        and f'WHERE "{table}"."id" =' in q['sql']
+    ]
+
+
+@pytest.mark.parametrize('method, url, table', [
+    ('get', '/posts/{post}/', 'blog_post'),
+    ('get', '/posts/{post}/edit/', 'blog_post'),
+    ('get', '/posts/{post}/delete/', 'blog_post'),
+    ('post', '/posts/{post}/delete/', 'blog_post'),
+    ('get', '/posts/{post}/edit_comment/{comment}/', 'blog_comment'),
+    ('get', '/posts/{post}/delete_comment/{comment}/', 'blog_comment'),
+    ('post', '/posts/{post}/delete_comment/{comment}/', 'blog_comment'),
+])
+def test_object_is_looked_up_once(
+    mixer, user, user_client, published_category, method, url, table
+):
+    post = mixer.blend('blog.Post', author=user, category=published_category)
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    url = url.format(post=post.id, comment=comment.id)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(user_client, method)(url)
+    assert response.status_code in (200, 302), url
+    assert len(lookups_of(queries, table)) == 1
+
+
+@override_settings(PAGE_CACHE_FOR_USERS=False)
+def test_comment_thread_is_paginated_with_authors(
+    mixer, user, user_client, published_category
+):
+    post = mixer.blend('blog.Post', author=user, category=published_category)
+    url = f'/posts/{post.id}/'
+    mixer.blend('blog.Comment', post=post)
+    load_references()
+    queries_for_one = count_queries(user_client, url)
+    mixer.cycle(COMMENTS_PAGINATION * 2).blend('blog.Comment', post=post)
+    assert count_queries(user_client, url) == queries_for_one
+
+    response = user_client.get(url)
+    comments = response.context['comments']
+    assert len(comments) == COMMENTS_PAGINATION
+    assert comments.has_next()
+
+    fragment = user_client.get(
+        f'/posts/{post.id}/comments/?cursor={comments.next_cursor}'
+    )
+    shown = {c.pk for c in comments} | {
+        c.pk for c in fragment.context['comments']
+    }
+    assert len(shown) == COMMENTS_PAGINATION * 2
+    assert '<html' not in fragment.content.decode()
+
+
+def test_deferred_fields_are_not_loaded_per_row(
+    mixer, user, published_category, published_locations
+):
+    add_posts(mixer, 5, user, published_category, published_locations)
+    querysets = (
+        Post.objects.only('title', 'text'),
+        Comment.objects.only('text'),
+        User.objects.only('email'),
+    )
+    for queryset in querysets:
+        with CaptureQueriesContext(connection) as queries:
+            assert list(queryset)
+        assert len(queries) == 1, queryset.model
@@ -0,0 +1,61 @@
+import re
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+CHECKED_TABLES = ('blog_post', 'blog_comment')
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_indexed_plans(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, url
+
+    for query in queries:
+        sql = query['sql']
+        if not sql.startswith('SELECT') or not any(
+            f'"{table}"' in sql for table in CHECKED_TABLES
+        ):
+            continue
+        for step in explain(sql):
+            full_scan = FULL_SCAN.search(step)
+            assert not (full_scan and full_scan.group(1) in CHECKED_TABLES), (
+                f'{url}: полный просмотр таблицы\n{step}\n{sql}'
+            )
+            assert TEMP_SORT not in step, (
+                f'{url}: сортировка во временном B-дереве\n{step}\n{sql}'
+            )
+
+
+@pytest.mark.parametrize('client_name', ['user_client', 'unlogged_client'])
+def test_list_views_use_indexes(
+    request, client_name, user, many_posts_with_published_locations,
+    published_category
+):
+    client = request.getfixturevalue(client_name)
+    cursor = client.get('/').context['page_obj'].next_cursor
+    for url in (
+        '/',
+        '/?page=2',
+        f'/?cursor={cursor}',
+        f'/category/{published_category.slug}/',
+        f'/profile/{user.username}/',
+    ):
+        assert_indexed_plans(client, url)
+
+
+def test_post_detail_uses_indexes(user_client, comment_to_a_post):
+    assert_indexed_plans(user_client, f'/posts/{comment_to_a_post.post_id}/')
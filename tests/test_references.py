@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache_versions import version_key
+from blog.models import Category
+from blog.references import categories
+from core import invalidation
+from core.invalidation import bus
+
+from conftest import load_references
+
+pytestmark = [pytest.mark.django_db]
+
+
+def reference_queries(queries):
+    return [
+        q['sql'] for q in queries
+        if 'blog_category' in q['sql'] or 'blog_location' in q['sql']
+    ]
+
+
+@pytest.mark.parametrize('url', [
+    '/', '/category/{category}/', '/posts/{post}/',
+    '/feeds/category/{category}/rss/',
+])
+def test_pages_do_not_query_reference_tables(
+    client, post_with_published_location, url
+):
+    post = post_with_published_location
+    url = url.format(category=post.category.slug, post=post.pk)
+    load_references()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        content = b''.join(response) if response.streaming else (
+            response.content
+        )
+    assert response.status_code == 200
+    assert post.title in content.decode()
+    assert reference_queries(queries) == []
+
+
+def test_unpublished_category_hides_posts_at_once(
+    client, post_with_published_location
+):
+    post = post_with_published_location
+    category = post.category
+    assert post.title in client.get('/').content.decode()
+    category.is_published = False
+    category.save()
+    assert post.title not in client.get('/').content.decode()
+    assert client.get(f'/category/{category.slug}/').status_code == 404
+
+
+def test_change_is_applied_after_commit(
+    published_category, django_capture_on_commit_callbacks
+):
+    load_references()
+    with django_capture_on_commit_callbacks(execute=True):
+        published_category.is_published = False
+        published_category.save()
+        # До фиксации другие потоки перечитали бы старую таблицу.
+        assert published_category.pk in categories.published_ids()
+    assert published_category.pk not in categories.published_ids()
+
+
+def test_rolled_back_change_is_not_applied(published_category):
+    load_references()
+    generation = categories.generation
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            published_category.title = 'Откат'
+            published_category.save()
+            raise RuntimeError
+    assert categories.generation == generation
+
+
+def test_event_from_another_process_reloads_registry(published_category):
+    load_references()
+    # Другой процесс снял категорию с публикации.
+    Category.objects.filter(pk=published_category.pk).update(
+        is_published=False
+    )
+    bus.poll(force=True)
+    assert published_category.pk in categories.published_ids()
+    invalidation.append([{
+        'namespace': 'category', 'pk': published_category.pk, 'version': 'v',
+    }])
+    bus.poll(force=True)
+    assert published_category.pk not in categories.published_ids()
+
+
+def test_cached_page_is_rendered_with_current_references(
+    client, post_with_published_location
+):
+    post = post_with_published_location
+    load_references()
+    # Изменение из другого процесса, событие о котором ещё не пришло:
+    # версия ('feed', 'refs') в кеше Django уже новая.
+    Category.objects.filter(pk=post.category_id).update(title='Новое имя')
+    cache.set(version_key('feed', 'refs'), 'other', None)
+    assert 'Новое имя' in client.get('/').content.decode()
+
+
+def test_unknown_slug_is_read_from_database(client):
+    load_references()
+    # bulk_create не посылает сигналов, справочник о категории не знает.
+    Category.objects.bulk_create([Category(
+        title='Свежая', description='', slug='fresh', is_published=True
+    )])
+    assert client.get('/category/fresh/').status_code == 200
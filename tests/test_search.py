@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog import search
+from blog.models import Post, SearchEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def found(client, query):
+    response = client.get('/search/', {'q': query})
+    assert response.status_code == 200
+    return {post.pk for post in response.context['page_obj']}
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        title='Публикация о реке', text='Сплавлялись по горным рекам.'
+    )
+
+
+def test_search_uses_russian_stems(user_client, post):
+    assert found(user_client, 'публикации') == {post.pk}
+    assert found(user_client, 'РЕКА горная') == {post.pk}
+    assert found(user_client, 'река озеро') == set()
+    assert found(user_client, '') == set()
+
+
+def test_search_respects_publication(
+    mixer, user, user_client, post, published_category
+):
+    hidden = mixer.cycle(2).blend(
+        'blog.Post', author=user, title='Публикация',
+        category=mixer.sequence(
+            mixer.blend('blog.Category', is_published=False),
+            published_category,
+        ),
+        pub_date=mixer.sequence(
+            timezone.now(), timezone.now() + timedelta(days=1)
+        ),
+    )
+    assert found(user_client, 'публикация') == {post.pk}
+    assert all(search.post_terms(p) for p in hidden)
+
+
+def test_index_follows_edits(user_client, post):
+    post.title = 'Заметка об озере'
+    post.save()
+    assert found(user_client, 'озеро') == {post.pk}
+    assert found(user_client, 'публикация') == set()
+
+    post.delete()
+    assert not SearchEntry.objects.exists()
+
+
+def test_rebuild_command(user_client, mixer, user, published_category):
+    Post.objects.bulk_create([
+        Post(
+            title=f'Пост {i}', text='Новые публикации', author=user,
+            category=published_category, pub_date=timezone.now()
+        )
+        for i in range(5)
+    ])
+    assert found(user_client, 'публикация') == set()
+    call_command('rebuild_search_index', '--batch-size=2')
+    assert len(found(user_client, 'публикация')) == 5
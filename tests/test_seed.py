@@ -0,0 +1,64 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+
+from blog.models import Category, Comment, Location, Post, SearchEntry
+from blog.references import categories
+
+from conftest import load_references
+
+pytestmark = [pytest.mark.django_db]
+
+
+def seed(**options):
+    call_command('seed_blog', stdout=StringIO(), **options)
+
+
+def test_seed_blog_creates_consistent_data():
+    seed(
+        users=3, categories=2, locations=2, posts=20, comments=50,
+        batch_size=7,
+    )
+    assert get_user_model().objects.count() == 3
+    assert Category.objects.count() == 2
+    assert Location.objects.count() == 2
+    assert Post.objects.count() == 20
+    assert Comment.objects.count() == 50
+    drifted = Post.objects.annotate(
+        actual=Count('comments')
+    ).exclude(comments_count=F('actual'))
+    assert not drifted.exists()
+    assert SearchEntry.objects.exists()
+
+
+def test_seed_blog_reuses_existing_rows():
+    seed(users=2, categories=1, locations=0, posts=5, comments=0)
+    seed(
+        users=0, categories=0, locations=0, posts=5, comments=10,
+        skip_search_index=True,
+    )
+    assert Post.objects.count() == 10
+    assert Comment.objects.count() == 10
+
+
+def test_seed_blog_needs_authors():
+    with pytest.raises(CommandError):
+        seed(users=0, categories=1, posts=1, comments=0)
+
+
+def test_seeded_categories_reach_registries(
+    django_capture_on_commit_callbacks
+):
+    load_references()
+    with django_capture_on_commit_callbacks(execute=True):
+        seed(
+            users=1, categories=3, locations=1, posts=0, comments=0,
+            skip_search_index=True,
+        )
+    published = Category.objects.filter(is_published=True)
+    assert set(categories.published_ids()) == set(
+        published.values_list('pk', flat=True)
+    )
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT = Path(__file__).resolve().parent.parent / 'blogicum'
+
+SHOW_CACHE = '''
+from django.conf import settings
+print(settings.CACHES['default']['BACKEND'])
+'''
+
+
+def load_settings(**env):
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ('DJANGO_SECRET_KEY', 'BLOGICUM_PROFILE')
+    } | env
+    return subprocess.run(
+        [sys.executable, '-c', SHOW_CACHE],
+        cwd=PROJECT,
+        env={
+            **env,
+            'PYTHONPATH': str(PROJECT),
+            'DJANGO_SETTINGS_MODULE': 'blogicum.settings',
+        },
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_production_requires_secret_key():
+    result = load_settings(BLOGICUM_PROFILE='production')
+    assert result.returncode != 0
+    assert 'ImproperlyConfigured' in result.stderr
+    assert 'DJANGO_SECRET_KEY' in result.stderr
+
+
+def test_production_cache_is_shared_between_processes():
+    result = load_settings(
+        BLOGICUM_PROFILE='production', DJANGO_SECRET_KEY='secret'
+    )
+    assert result.stdout.strip() == (
+        'django.core.cache.backends.filebased.FileBasedCache'
+    )
+    assert load_settings().stdout.strip() == (
+        'django.core.cache.backends.locmem.LocMemCache'
+    )
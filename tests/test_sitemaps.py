@@ -0,0 +1,72 @@
+from xml.dom import minidom
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import sitemaps
+
+pytestmark = [pytest.mark.django_db]
+
+
+def locations(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, url
+    document = minidom.parseString(response.content)
+    return [
+        node.firstChild.data for node in document.getElementsByTagName('loc')
+    ]
+
+
+def test_sitemap_lists_published_pages(
+    client, post_with_published_location, posts_with_unpublished_category
+):
+    post = post_with_published_location
+    shards = locations(client, '/sitemap.xml')
+    assert shards == [
+        f'http://testserver/sitemap-{name}-0.xml'
+        for name in ('posts', 'categories', 'profiles')
+    ]
+    urls = [
+        url for shard in shards
+        for url in locations(client, shard.replace('http://testserver', ''))
+    ]
+    assert urls == [
+        f'http://testserver/posts/{post.id}/',
+        f'http://testserver/category/{post.category.slug}/',
+        f'http://testserver/profile/{post.author.username}/',
+    ]
+
+
+def test_posts_are_sharded_by_id(
+    client, monkeypatch, mixer, user, published_category
+):
+    monkeypatch.setattr(sitemaps, 'SHARD_SIZE', 2)
+    posts = mixer.cycle(5).blend(
+        'blog.Post', author=user, category=published_category
+    )
+    shards = [
+        url for url in locations(client, '/sitemap.xml') if 'posts' in url
+    ]
+    assert shards == [
+        f'http://testserver/sitemap-posts-{shard}.xml'
+        for shard in sorted({post.pk // 2 for post in posts})
+    ]
+    assert sum(
+        len(locations(client, url.replace('http://testserver', '')))
+        for url in shards
+    ) == 5
+
+
+def test_shard_is_cached(client, post_with_published_location):
+    locations(client, '/sitemap-posts-0.xml')
+    with CaptureQueriesContext(connection) as queries:
+        locations(client, '/sitemap-posts-0.xml')
+    assert len(queries) == 0
+    assert client.get('/sitemap-drafts-0.xml').status_code == 404
+
+
+def test_shard_past_the_end_is_404(client, post_with_published_location):
+    assert client.get('/sitemap-posts-0.xml').status_code == 200
+    assert client.get('/sitemap-posts-7.xml').status_code == 404
+    assert client.get('/sitemap-categories-7.xml').status_code == 404
@@ -0,0 +1,90 @@
+from unittest import mock
+from xml.dom import minidom
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import syndication
+
+pytestmark = [pytest.mark.django_db]
+
+
+def read(response):
+    assert response.status_code == 200
+    return minidom.parseString(b''.join(response.streaming_content))
+
+
+@pytest.fixture
+def urls(post_with_published_location):
+    post = post_with_published_location
+    return [
+        f'/feeds/{fmt}/' for fmt in ('rss', 'atom')
+    ] + [
+        f'/feeds/category/{post.category.slug}/atom/',
+        f'/feeds/author/{post.author.username}/rss/',
+    ]
+
+
+def test_feeds_list_published_posts(
+    client, urls, post_with_published_location, posts_with_unpublished_category
+):
+    for url in urls:
+        document = read(client.get(url))
+        items = (
+            document.getElementsByTagName('item')
+            or document.getElementsByTagName('entry')
+        )
+        assert len(items) == 1, url
+        assert post_with_published_location.title in items[0].toxml()
+
+
+def test_unknown_format_and_hidden_category(client, mixer):
+    category = mixer.blend('blog.Category', is_published=False)
+    assert client.get('/feeds/json/').status_code == 404
+    assert client.get(
+        f'/feeds/category/{category.slug}/rss/'
+    ).status_code == 404
+
+
+def test_unchanged_poll_is_not_modified(client, urls):
+    for url in urls:
+        response = client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            again = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert again.status_code == 304, url
+        assert len(queries) <= 2, url
+
+
+def test_items_are_cached(client, urls, post_with_published_location):
+    read(client.get(urls[0]))
+    with mock.patch.object(
+        syndication.StreamingRssFeed, 'render_item'
+    ) as render_item:
+        read(client.get(urls[0]))
+    render_item.assert_not_called()
+
+    post_with_published_location.title = 'Новый заголовок'
+    post_with_published_location.save()
+    assert 'Новый заголовок' in read(client.get(urls[0])).toxml()
+
+
+def test_items_are_rendered_while_streaming(
+    client, urls, post_with_published_location
+):
+    response = client.get(urls[0])
+    with mock.patch.object(
+        syndication.StreamingRssFeed, 'render_item', return_value='<item/>'
+    ) as render_item:
+        content = iter(response.streaming_content)
+        next(content)
+        render_item.assert_not_called()
+        b''.join(content)
+    render_item.assert_called_once()
+
+
+def test_items_are_cached_per_scheme(client, urls):
+    assert 'http://testserver/' in read(client.get(urls[0])).toxml()
+    secure = read(client.get(urls[0], secure=True)).toxml()
+    assert 'http://testserver/' not in secure
+    assert 'https://testserver/' in secure
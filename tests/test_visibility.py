@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def mixed_posts(mixer, user, published_category):
+    now = timezone.now()
+    return [
+        mixer.blend('blog.Post', category=published_category),
+        mixer.blend('blog.Post', category=published_category,
+                    is_published=False),
+        mixer.blend('blog.Post', category=published_category,
+                    pub_date=now + timedelta(days=1)),
+        mixer.blend('blog.Post', category__is_published=False),
+        mixer.blend('blog.Post', category=published_category, author=user,
+                    is_published=False),
+    ]
+
+
+def test_predicate_matches_queryset(mixed_posts, user, another_user):
+    for viewer in (AnonymousUser(), user, another_user):
+        expected = {
+            post.id for post in Post.objects.select_related('category')
+            if post.is_visible_to(viewer)
+        }
+        actual = set(
+            Post.objects.get_all_posts().visible_to(viewer)
+            .values_list('id', flat=True)
+        )
+        assert actual == expected
+
+
+def test_predicate_on_loaded_post_needs_no_queries(mixed_posts, user):
+    posts = list(Post.objects.select_related('category'))
+    with CaptureQueriesContext(connection) as queries:
+        for post in posts:
+            post.is_visible_to(user)
+    assert len(queries) == 0
+